@@ -5,15 +5,21 @@ Main entry point for the web interface.
 
 import streamlit as st
 import os
+import queue
+from collections import deque
+import shutil
+import threading
 import time
-from datetime import datetime
 from dotenv import load_dotenv
 
-# Load environment variables from .env file
-load_dotenv()
+# Load environment variables from .env file (once per process, not per rerun)
+if not os.environ.get("_ENV_LOADED"):
+    load_dotenv()
+    os.environ["_ENV_LOADED"] = "1"
 
 from src import config
 from src.core.pipeline import process_video_pipeline
+from src.analyzers.posture_analyzer import PostureAnalyzer
 from src.models.content_evaluator import ContentEvaluator
 
 
@@ -33,7 +39,6 @@ st.set_page_config(
 #         Tuple of (success: bool, message: str)
 #     """
 #     # Check Groq API key
-#     import os
 #     if not os.getenv("GROQ_API_KEY"):
 #         return False, """
 #         ⚠️ **Groq API key is not set.**
@@ -42,6 +47,20 @@ st.set_page_config(
 #     return True, "All dependencies available ✓"
 
 
+@st.cache_resource
+def get_posture_analyzer() -> PostureAnalyzer:
+    """
+    Get the process-wide posture analyzer.
+    
+    Cached across reruns and sessions so MediaPipe graphs are loaded once
+    per Streamlit process instead of once per video.
+    
+    Returns:
+        Shared PostureAnalyzer instance
+    """
+    return PostureAnalyzer()
+
+
 def save_uploaded_file(uploaded_file) -> str:
     """
     Save uploaded file to disk.
@@ -52,18 +71,88 @@ def save_uploaded_file(uploaded_file) -> str:
     Returns:
         Path to saved file
     """
-    # Create unique filename with timestamp
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = f"{timestamp}_{uploaded_file.name}"
+    # Create unique filename with nanosecond timestamp
+    filename = f"{time.time_ns()}_{uploaded_file.name}"
     filepath = os.path.join(config.UPLOAD_DIR, filename)
     
-    # Save file
+    # Stream to disk in chunks instead of materializing the whole buffer
+    uploaded_file.seek(0)
     with open(filepath, 'wb') as f:
-        f.write(uploaded_file.getbuffer())
+        shutil.copyfileobj(uploaded_file, f, length=config.UPLOAD_COPY_CHUNK_SIZE)
     
     return filepath
 
 
+def iter_pipeline_updates(video_path: str):
+    """
+    Run the processing pipeline on a background thread.
+    
+    Updates are handed over through a bounded queue so analysis keeps
+    running while the main thread renders the previous update.
+    
+    Args:
+        video_path: Path to video file
+        
+    Yields:
+        Progress updates from the pipeline, or None whenever the queue has
+        been idle for a moment (lets the caller flush deferred renders)
+    """
+    # Resolve cached resources on the script thread
+    posture_analyzer = get_posture_analyzer()
+    
+    updates = queue.Queue(maxsize=config.UI_UPDATE_QUEUE_SIZE)
+    stop = threading.Event()
+    done = object()
+    
+    def put(item) -> bool:
+        # Give up if the consumer has gone away
+        while not stop.is_set():
+            try:
+                updates.put(item, timeout=0.05)
+                return True
+            except queue.Full:
+                continue
+        return False
+    
+    def produce():
+        pipeline = process_video_pipeline(video_path, posture_analyzer)
+        try:
+            for update in pipeline:
+                if not put(update):
+                    break
+        except Exception as e:
+            put({
+                'stage': 'error',
+                'progress': 0,
+                'message': f'Error: {str(e)}',
+                'error': str(e)
+            })
+        finally:
+            # Runs pipeline cleanup even when stopped early
+            pipeline.close()
+            put(done)
+    
+    worker = threading.Thread(target=produce, name='pipeline', daemon=True)
+    worker.start()
+    
+    try:
+        while True:
+            try:
+                update = updates.get(timeout=0.05)
+            except queue.Empty:
+                if not worker.is_alive():
+                    break
+                yield None
+                continue
+            
+            if update is done:
+                break
+            yield update
+    finally:
+        # Worker exits and cleans up at its next hand-off
+        stop.set()
+
+
 def display_results(result: dict):
     """
     Display final analysis results.
@@ -208,23 +297,53 @@ def main():
             status_text = st.empty()
             chunk_info = st.empty()
             
+            # Rolling log of recent segment transcripts
+            st.session_state['recent_segments'] = deque(maxlen=config.UI_RECENT_SEGMENTS)
+            
+            def render_status(update: dict):
+                # Update progress bar and status text
+                progress_bar.progress(update['progress'] / 100)
+                status_text.markdown(f"**Status:** {update['message']}")
+            
             # Process video through pipeline
             try:
                 final_result = None
+                last_render = 0.0
+                last_stage = None
+                deferred = None  # Newest update held back by the throttle
                 
-                for update in process_video_pipeline(video_path):
-                    # Update progress bar
-                    progress_bar.progress(update['progress'] / 100)
+                for update in iter_pipeline_updates(video_path):
+                    now = time.monotonic()
+                    
+                    if update is None:
+                        # Queue idle: draw the update the throttle held back,
+                        # so a long stage never shows a stale status
+                        if deferred is not None:
+                            render_status(deferred)
+                            last_render, last_stage, deferred = now, deferred['stage'], None
+                        continue
                     
-                    # Update status text
-                    status_text.markdown(f"**Status:** {update['message']}")
+                    # Throttle redraws; never drop stage changes, chunk,
+                    # final or error updates
+                    if (
+                        now - last_render >= config.UI_MIN_RENDER_INTERVAL
+                        or update['stage'] != last_stage
+                        or 'chunk_result' in update
+                        or update['stage'] in ('complete', 'error')
+                    ):
+                        render_status(update)
+                        last_render, last_stage, deferred = now, update['stage'], None
+                    else:
+                        deferred = update
                     
                     # Display chunk results if available
                     if 'chunk_result' in update:
                         chunk = update['chunk_result']
-                        chunk_info.info(
-                            f"Segment {chunk['chunk_idx'] + 1}: {chunk['transcript']}"
+                        recent_segments = st.session_state['recent_segments']
+                        recent_segments.append(
+                            f"**Segment {chunk['chunk_idx'] + 1}:** {chunk['transcript']}"
                         )
+                        chunk_info.markdown("\n\n".join(recent_segments))
                     
                     # Store final result
                     if 'final_result' in update:
@@ -234,9 +353,6 @@ def main():
                     if update['stage'] == 'error':
                         st.error(f"Processing failed: {update['message']}")
                         break
-                    
-                    # Small delay to make updates visible
-                    time.sleep(0.1)
                 
                 # Display results
                 if final_result:
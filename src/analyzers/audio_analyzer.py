@@ -1,39 +1,114 @@
 """
 Audio Analyzer Module
-Extracts audio features using librosa and computes audio quality score.
+Extracts audio features with soundfile + NumPy and computes audio quality score.
 """
 
-import librosa
+import math
 import numpy as np
-from typing import Dict
+import soundfile as sf
+from typing import Dict, Optional, Union
 from src import config
 
 
+# Framing of librosa.feature.rms, which the RMS_ENERGY_* thresholds were
+# tuned against (centered, zero-padded frames)
+_RMS_FRAME_LENGTH = 2048
+_RMS_HOP_LENGTH = 512
+
+
+def _build_energy_table():
+    """
+    Precompute the piecewise-linear RMS energy score table.
+    
+    Inside [RMS_ENERGY_MIN, RMS_ENERGY_MAX] the score is a tent peaking at
+    RMS_ENERGY_OPTIMAL, floored at 70. Its only kinks are the band edges,
+    the optimum and the points where the tent crosses 70, so linear
+    interpolation between those knots reproduces it exactly.
+    
+    Returns:
+        Tuple of (knot energies, knot scores)
+    """
+    low, high = config.RMS_ENERGY_MIN, config.RMS_ENERGY_MAX
+    optimal = config.RMS_ENERGY_OPTIMAL
+    max_deviation = high - optimal
+    floor_offset = 0.3 * max_deviation  # Tent reaches 70 here
+    
+    knots_x = np.unique(np.clip(
+        [low, optimal - floor_offset, optimal, optimal + floor_offset, high],
+        low, high
+    ))
+    knots_y = np.maximum(70, 100 * (1 - np.abs(knots_x - optimal) / max_deviation))
+    return knots_x, knots_y
+
+
+_ENERGY_KNOTS_X, _ENERGY_KNOTS_Y = _build_energy_table()
+
+
+def score_rms_energy(energy: Union[float, np.ndarray]) -> np.ndarray:
+    """
+    Score RMS energy on 0-100 scale (vectorized).
+    
+    Optimal energy indicates good volume.
+    Too low = hard to hear (40), too high = shouting (70).
+    
+    Args:
+        energy: RMS energy value or array (e.g. one per chunk)
+        
+    Returns:
+        Array of scores with the same shape as energy
+    """
+    energy = np.asarray(energy, dtype=np.float64)
+    # np.interp holds the last knot (70) above RMS_ENERGY_MAX
+    return np.where(
+        energy < config.RMS_ENERGY_MIN,
+        40.0,
+        np.interp(energy, _ENERGY_KNOTS_X, _ENERGY_KNOTS_Y)
+    )
+
+
 class AudioAnalyzer:
     """
     Analyzes audio features to evaluate voice quality.
     Extracts pitch variance, RMS energy, and speaking rate.
     """
     
-    def __init__(self, audio_path: str):
+    def __init__(self, audio_path: str, y: Optional[np.ndarray] = None, sr: Optional[int] = None):
         """
         Initialize audio analyzer.
         
         Args:
             audio_path: Path to audio file (WAV format, 16kHz mono)
+            y: Already-decoded float32 mono samples of that file, if
+                available (skips reading it again)
+            sr: Sample rate of y
         """
         self.audio_path = audio_path
-        self.y = None
-        self.sr = None
+        self.y = None if y is None else y.astype(np.float32, copy=False)
+        self.sr = sr
         
     def load_audio(self):
-        """Load audio file using librosa."""
+        """
+        Load audio file using soundfile.
+        
+        The pipeline already writes 16kHz mono WAV, so this is normally a
+        plain PCM read; resampling only kicks in for other inputs.
+        """
         if self.y is None:
-            self.y, self.sr = librosa.load(
-                self.audio_path, 
-                sr=config.AUDIO_SAMPLE_RATE,
-                mono=True
-            )
+            y, sr = sf.read(self.audio_path, dtype='float32', always_2d=False)
+            
+            # Downmix to mono
+            if y.ndim > 1:
+                y = y.mean(axis=1)
+            
+            if sr != config.AUDIO_SAMPLE_RATE:
+                from scipy.signal import resample_poly
+                g = math.gcd(sr, config.AUDIO_SAMPLE_RATE)
+                y = resample_poly(y, config.AUDIO_SAMPLE_RATE // g, sr // g)
+                sr = config.AUDIO_SAMPLE_RATE
+            
+            # Keep samples float32 so reductions don't promote to float64
+            self.y = y.astype(np.float32, copy=False)
+            self.sr = sr
     
     def extract_features(self) -> Dict[str, float]:
         """
@@ -58,13 +133,35 @@ class AudioAnalyzer:
         """
         Extract RMS (root mean square) energy.
         
-        Indicates volume/loudness of speech.
+        Indicates volume/loudness of speech. Mean of per-frame RMS, matching
+        librosa.feature.rms (2048-sample frames, 512 hop, centered with zero
+        padding). The hop divides the frame, so squared sums are taken once
+        per hop-sized block and each frame adds up four blocks, without
+        materializing overlapping frames.
         
         Returns:
-            Mean RMS energy
+            RMS energy
         """
-        rms = librosa.feature.rms(y=self.y)[0]
-        return float(np.mean(rms))
+        y = self.y
+        n = y.size
+        if n == 0:
+            return 0.0
+        
+        hop = _RMS_HOP_LENGTH
+        blocks_per_frame = _RMS_FRAME_LENGTH // hop
+        full = y[:n - n % hop].reshape(-1, hop)
+        block_energy = np.einsum('ij,ij->i', full, full).astype(np.float64)
+        if n % hop:
+            rest = y[n - n % hop:]
+            block_energy = np.append(block_energy, np.dot(rest, rest))
+        
+        # Centering pads half a frame of zeros before the signal
+        pad = np.zeros(blocks_per_frame // 2)
+        block_energy = np.concatenate([pad, block_energy, pad, pad])
+        
+        n_frames = 1 + n // hop
+        frame_energy = np.convolve(block_energy, np.ones(blocks_per_frame), 'valid')[:n_frames]
+        return float(np.mean(np.sqrt(frame_energy / _RMS_FRAME_LENGTH)))
     
     def compute_score(self) -> float:
         """
@@ -88,21 +185,9 @@ class AudioAnalyzer:
         """
         Score RMS energy on 0-100 scale.
         
-        Optimal energy indicates good volume.
-        Too low = hard to hear, too high = shouting.
+        See score_rms_energy for the scoring bands.
         """
-        if energy < config.RMS_ENERGY_MIN:
-            # Too quiet
-            return 40
-        elif energy > config.RMS_ENERGY_MAX:
-            # Too loud
-            return 70
-        else:
-            # Score based on proximity to optimal
-            deviation = abs(energy - config.RMS_ENERGY_OPTIMAL)
-            max_deviation = config.RMS_ENERGY_MAX - config.RMS_ENERGY_OPTIMAL
-            score = 100 * (1 - deviation / max_deviation)
-            return max(70, score)
+        return float(score_rms_energy(energy))
 
 
 def analyze_audio(audio_path: str) -> float:
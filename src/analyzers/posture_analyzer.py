@@ -3,14 +3,26 @@ Posture Analyzer Module
 Uses MediaPipe Pose to analyze body posture from video frames.
 """
 
+import queue
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 import mediapipe as mp
 import numpy as np
-from typing import List, Dict
+from typing import Dict, Iterable
 from src import config
 
 # MediaPipe Pose solution (NOT mediapipe.tasks)
 mp_pose = mp.solutions.pose
 
+# Landmark indices used for posture: left/right shoulder, left/right hip
+_KEYPOINT_INDICES = tuple(int(landmark) for landmark in (
+    mp_pose.PoseLandmark.LEFT_SHOULDER,
+    mp_pose.PoseLandmark.RIGHT_SHOULDER,
+    mp_pose.PoseLandmark.LEFT_HIP,
+    mp_pose.PoseLandmark.RIGHT_HIP
+))
+
 
 class PostureAnalyzer:
     """
@@ -18,22 +30,129 @@ class PostureAnalyzer:
     Computes posture score based on shoulder-hip vertical alignment.
     """
     
-    def __init__(self):
+    def __init__(self, fast_mode: bool = config.POSTURE_FAST_MODE,
+                 num_workers: int = config.POSTURE_NUM_WORKERS):
         """
-        Initialize MediaPipe Pose with explicit parameters.
+        Initialize posture analyzer.
         
         Design choice: static_image_mode=True because we process
         individual sampled frames, not continuous video stream.
+        Frames are fanned out over a small thread pool. Pose graphs live
+        in an object pool of at most num_workers instances, built lazily
+        and checked out per frame (the C++ graph releases the GIL while
+        running inference), so memory stays bounded no matter how many
+        sessions share the analyzer.
+        
+        Fast mode uses the lite model in streaming mode: each
+        analyze_frames call builds its own tracking graph and feeds it
+        frames in order, so the tracker reuses state between consecutive
+        samples instead of re-running detection. Tracking state is never
+        shared between calls (the analyzer is shared across sessions).
+        
+        Args:
+            fast_mode: Use lite model + tracking instead of full detection
+            num_workers: Number of inference threads (ignored in fast mode)
+        """
+        self.fast_mode = fast_mode
+        self.num_workers = 1 if fast_mode else max(1, num_workers)
+        
+        # Pool of Pose graphs, created on first use
+        self._pose_pool = queue.Queue()
+        self._poses = []
+        self._poses_lock = threading.Lock()
+        self._executor = None
+    
+    def _create_pose(self, tracking: bool = False):
+        """
+        Create a MediaPipe Pose graph.
+        
+        Args:
+            tracking: Build the fast-mode streaming graph, which keeps
+                state between frames and must not be shared
         """
-        self.pose = mp_pose.Pose(
+        if tracking:
+            return mp_pose.Pose(
+                static_image_mode=False,
+                model_complexity=0,  # Lite model
+                enable_segmentation=config.MEDIAPIPE_ENABLE_SEGMENTATION,
+                smooth_landmarks=True,
+                min_detection_confidence=config.MEDIAPIPE_MIN_DETECTION_CONFIDENCE,
+                min_tracking_confidence=config.MEDIAPIPE_MIN_TRACKING_CONFIDENCE
+            )
+        
+        return mp_pose.Pose(
             static_image_mode=config.MEDIAPIPE_STATIC_IMAGE_MODE,
-            model_complexity=1,  # 0=lite, 1=full, 2=heavy
+            model_complexity=0 if self.fast_mode else config.MEDIAPIPE_MODEL_COMPLEXITY,
             enable_segmentation=config.MEDIAPIPE_ENABLE_SEGMENTATION,
             smooth_landmarks=config.MEDIAPIPE_SMOOTH_LANDMARKS,
             min_detection_confidence=config.MEDIAPIPE_MIN_DETECTION_CONFIDENCE,
             min_tracking_confidence=config.MEDIAPIPE_MIN_TRACKING_CONFIDENCE
         )
     
+    def _acquire_pose(self):
+        """
+        Check a Pose graph out of the pool.
+        
+        Builds a new graph while fewer than num_workers exist, otherwise
+        waits for one to be returned.
+        """
+        try:
+            return self._pose_pool.get_nowait()
+        except queue.Empty:
+            pass
+        
+        with self._poses_lock:
+            if len(self._poses) < self.num_workers:
+                pose = self._create_pose()
+                self._poses.append(pose)
+                return pose
+        
+        return self._pose_pool.get()
+    
+    def _release_pose(self, pose):
+        """Return a Pose graph to the pool."""
+        self._pose_pool.put(pose)
+    
+    def _detect_keypoints(self, frame: np.ndarray, pose=None):
+        """
+        Run pose detection and extract the shoulder/hip keypoints.
+        
+        Args:
+            frame: RGB image as numpy array
+            pose: Graph owned by the caller; a pooled graph is checked out
+                if None
+            
+        Returns:
+            (4, 3) float32 array of [x, y, visibility] rows ordered
+            left shoulder, right shoulder, left hip, right hip,
+            or None if no pose was detected
+        """
+        # MediaPipe copies internally unless given C-contiguous uint8 RGB
+        if frame.dtype != np.uint8 or not frame.flags['C_CONTIGUOUS']:
+            frame = np.ascontiguousarray(frame, dtype=np.uint8)
+        
+        if pose is not None:
+            results = pose.process(frame)
+        else:
+            pose = self._acquire_pose()
+            try:
+                results = pose.process(frame)
+            finally:
+                self._release_pose(pose)
+        
+        if not results.pose_landmarks:
+            return None
+        
+        landmarks = results.pose_landmarks.landmark
+        
+        # Get key points for posture analysis
+        # Using shoulder and hip landmarks, one protobuf access each
+        points = [landmarks[idx] for idx in _KEYPOINT_INDICES]
+        return np.array(
+            [(p.x, p.y, p.visibility) for p in points],
+            dtype=np.float32
+        )
+    
     def analyze_frame(self, frame: np.ndarray) -> Dict[str, float]:
         """
         Analyze a single frame for posture.
@@ -47,47 +166,33 @@ class PostureAnalyzer:
             - confidence: 0-1 (detection confidence)
             - detected: bool (whether pose was detected)
         """
-        results = self.pose.process(frame)
+        keypoints = self._detect_keypoints(frame)
         
-        if not results.pose_landmarks:
+        if keypoints is None:
             return {
                 'alignment_score': 0,
                 'confidence': 0,
                 'detected': False
             }
         
-        landmarks = results.pose_landmarks.landmark
-        
-        # Get key points for posture analysis
-        # Using shoulder and hip landmarks
-        left_shoulder = landmarks[mp_pose.PoseLandmark.LEFT_SHOULDER]
-        right_shoulder = landmarks[mp_pose.PoseLandmark.RIGHT_SHOULDER]
-        left_hip = landmarks[mp_pose.PoseLandmark.LEFT_HIP]
-        right_hip = landmarks[mp_pose.PoseLandmark.RIGHT_HIP]
-        
         # Calculate alignment score
-        alignment_score = self._calculate_alignment(
-            left_shoulder, right_shoulder, left_hip, right_hip
-        )
+        alignment_score = self._calculate_alignment(keypoints[np.newaxis])[0]
         
         # Average visibility as confidence
-        confidence = np.mean([
-            left_shoulder.visibility,
-            right_shoulder.visibility,
-            left_hip.visibility,
-            right_hip.visibility
-        ])
+        confidence = keypoints[:, 2].mean()
         
         return {
-            'alignment_score': alignment_score,
-            'confidence': confidence,
+            'alignment_score': float(alignment_score),
+            'confidence': float(confidence),
             'detected': True
         }
     
-    def _calculate_alignment(self, left_shoulder, right_shoulder, 
-                            left_hip, right_hip) -> float:
+    @staticmethod
+    def _calculate_alignment(keypoints: np.ndarray) -> np.ndarray:
         """
-        Calculate posture alignment score based on shoulder-hip vertical alignment.
+        Calculate posture alignment scores based on shoulder-hip vertical alignment.
+        
+        Vectorized over frames: one set of NumPy ops scores every frame.
         
         Good posture characteristics:
         - Shoulders roughly above hips (small horizontal offset)
@@ -95,31 +200,35 @@ class PostureAnalyzer:
         - Hips level (similar y-coordinates)
         
         Args:
-            left_shoulder, right_shoulder, left_hip, right_hip: MediaPipe landmarks
+            keypoints: (N, 4, 3) array of [x, y, visibility] for
+                left shoulder, right shoulder, left hip, right hip
             
         Returns:
-            Alignment score (0-100)
+            (N,) array of alignment scores (0-100)
         """
+        left_shoulder = keypoints[:, 0]
+        right_shoulder = keypoints[:, 1]
+        left_hip = keypoints[:, 2]
+        right_hip = keypoints[:, 3]
+        
         # Calculate midpoints
-        shoulder_mid_x = (left_shoulder.x + right_shoulder.x) / 2
-        shoulder_mid_y = (left_shoulder.y + right_shoulder.y) / 2
-        hip_mid_x = (left_hip.x + right_hip.x) / 2
-        hip_mid_y = (left_hip.y + right_hip.y) / 2
+        shoulder_mid = (left_shoulder + right_shoulder) * 0.5
+        hip_mid = (left_hip + right_hip) * 0.5
         
         # Vertical alignment: shoulders should be above hips with minimal horizontal offset
-        horizontal_offset = abs(shoulder_mid_x - hip_mid_x)
+        horizontal_offset = np.abs(shoulder_mid[:, 0] - hip_mid[:, 0])
         
         # Shoulder levelness
-        shoulder_tilt = abs(left_shoulder.y - right_shoulder.y)
+        shoulder_tilt = np.abs(left_shoulder[:, 1] - right_shoulder[:, 1])
         
         # Hip levelness
-        hip_tilt = abs(left_hip.y - right_hip.y)
+        hip_tilt = np.abs(left_hip[:, 1] - right_hip[:, 1])
         
         # Score calculation (inverse of deviations)
         # Lower offset/tilt = higher score
-        alignment_score = 100 * (1 - min(horizontal_offset * 2, 1.0))
-        shoulder_level_score = 100 * (1 - min(shoulder_tilt * 3, 1.0))
-        hip_level_score = 100 * (1 - min(hip_tilt * 3, 1.0))
+        alignment_score = 100 * (1 - np.minimum(horizontal_offset * 2, 1.0))
+        shoulder_level_score = 100 * (1 - np.minimum(shoulder_tilt * 3, 1.0))
+        hip_level_score = 100 * (1 - np.minimum(hip_tilt * 3, 1.0))
         
         # Weighted average
         final_score = (
@@ -128,55 +237,138 @@ class PostureAnalyzer:
             0.2 * hip_level_score
         )
         
-        return max(0, min(100, final_score))
+        return np.clip(final_score, 0, 100)
     
-    def analyze_frames(self, frames: List[np.ndarray]) -> float:
+    def analyze_frames(self, frames: Iterable[np.ndarray]) -> float:
         """
         Analyze multiple frames and return average posture score.
         
+        Detection runs per frame; scoring is done once over the stacked
+        keypoints of all detected frames.
+        
+        Frames must already be sampled (see VideoProcessor.stream_frames);
+        every frame passed in is run through MediaPipe. The input is
+        consumed once, with only a few frames in flight at a time, so a
+        streamed iterator is never fully held in memory.
+        
         Args:
-            frames: List of RGB frames
+            frames: Sampled RGB frames (list or iterator)
             
         Returns:
             Average posture score (0-100)
         """
-        if not frames:
+        if self.fast_mode:
+            detections = self._detect_tracked(frames)
+        else:
+            detections = self._detect_pooled(frames)
+        
+        if not detections:
+            # No frames sampled
             return 0
         
-        scores = []
-        confidences = []
+        detections = [d for d in detections if d is not None]
+        if not detections:
+            # No valid detections
+            return 20  # Neutral score
         
-        for frame in frames:
-            result = self.analyze_frame(frame)
-            if result['detected'] and result['confidence'] > 0.5:
-                scores.append(result['alignment_score'])
-                confidences.append(result['confidence'])
+        keypoints = np.stack(detections)
+        confidences = keypoints[:, :, 2].mean(axis=1)
+        valid = confidences > 0.5
         
-        if not scores:
+        if not valid.any():
             # No valid detections
             return 20  # Neutral score
         
+        scores = self._calculate_alignment(keypoints[valid])
+        weights = confidences[valid]
+        
         # Weighted average by confidence
-        weighted_score = np.average(scores, weights=confidences)
+        weighted_score = np.dot(scores, weights) / weights.sum()
         
         return float(weighted_score)
     
+    def _detect_tracked(self, frames: Iterable[np.ndarray]) -> list:
+        """
+        Detect keypoints in order on a tracking graph private to this call.
+        
+        Returns:
+            Keypoints (or None) per frame
+        """
+        pose = self._create_pose(tracking=True)
+        try:
+            return [self._detect_keypoints(frame, pose) for frame in frames]
+        finally:
+            pose.close()
+    
+    def _detect_pooled(self, frames: Iterable[np.ndarray]) -> list:
+        """
+        Detect keypoints on the shared worker pool and pooled graphs.
+        
+        Returns:
+            Keypoints (or None) per frame, in input order
+        """
+        if self._executor is None:
+            # Persistent pool shared by every caller
+            with self._poses_lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.num_workers,
+                        thread_name_prefix='pose'
+                    )
+        
+        # Bounded submission window; only the small keypoint arrays are kept
+        in_flight = deque()
+        detections = []
+        for frame in frames:
+            in_flight.append(self._executor.submit(self._detect_keypoints, frame))
+            if len(in_flight) >= 2 * self.num_workers:
+                detections.append(in_flight.popleft().result())
+        detections.extend(future.result() for future in in_flight)
+        
+        return detections
+    
+    def close(self):
+        """
+        Release MediaPipe resources.
+        
+        Shuts down the worker pool and closes every Pose graph. Safe to
+        call more than once; the analyzer rebuilds graphs if used again.
+        """
+        executor = getattr(self, '_executor', None)
+        if executor is not None:
+            executor.shutdown(wait=True)
+            self._executor = None
+        
+        poses_lock = getattr(self, '_poses_lock', None)
+        if poses_lock is None:
+            return
+        with poses_lock:
+            poses, self._poses = self._poses, []
+            self._pose_pool = queue.Queue()
+        for pose in poses:
+            pose.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+    
     def __del__(self):
-        """Clean up MediaPipe resources."""
-        if hasattr(self, 'pose'):
-            self.pose.close()
+        """Fallback cleanup; prefer close() or a with block."""
+        self.close()
 
 
-def analyze_posture(frames: List[np.ndarray]) -> float:
+def analyze_posture(frames: Iterable[np.ndarray]) -> float:
     """
     Convenience function to analyze posture from frames.
     
     Args:
-        frames: List of RGB frames
+        frames: RGB frames (list or iterator)
         
     Returns:
         Posture score (0-100)
     """
-    analyzer = PostureAnalyzer()
-    score = analyzer.analyze_frames(frames)
-    return score
+    with PostureAnalyzer() as analyzer:
+        return analyzer.analyze_frames(frames)
@@ -27,6 +27,11 @@ MEDIAPIPE_ENABLE_SEGMENTATION = False
 MEDIAPIPE_SMOOTH_LANDMARKS = False
 MEDIAPIPE_MIN_DETECTION_CONFIDENCE = 0.5
 MEDIAPIPE_MIN_TRACKING_CONFIDENCE = 0.5
+MEDIAPIPE_MODEL_COMPLEXITY = 1  # 0=lite, 1=full, 2=heavy
+
+# Posture inference parallelism
+POSTURE_NUM_WORKERS = min(4, os.cpu_count() or 1)  # Threads, each with its own Pose graph
+POSTURE_FAST_MODE = False  # Lite model + streaming (tracking) mode, one tracking graph per analyze_frames call
 
 # ============================================================================
 # PROCESSING PARAMETERS
@@ -36,10 +41,30 @@ MEDIAPIPE_MIN_TRACKING_CONFIDENCE = 0.5
 AUDIO_SAMPLE_RATE = 16000  # Hz (required by faster-whisper)
 AUDIO_CHANNELS = 1  # Mono
 AUDIO_CHUNK_DURATION = 30  # seconds - reduced to 30s for faster UI updates
+AUDIO_CHUNK_OVERLAP = 1.0  # seconds of audio repeated at chunk starts (no words cut at boundaries)
+TRANSCRIPTION_MAX_WORKERS = 4  # Chunks transcribed concurrently (network-bound)
+TRANSCRIPTION_SEGMENT_DURATION = 300  # seconds - long audio files are split and transcribed concurrently
+TRANSCRIPTION_SPLIT_SEARCH = 10  # seconds either side of each split searched for the quietest point
+TRANSCRIPTION_OPUS_BITRATE = "24k"  # Whisper uploads re-encoded to mono Opus; None uploads lossless audio
+EVALUATION_MAX_WORKERS = 4  # Transcripts evaluated concurrently, overlapping transcription
+GROQ_BATCH_POLL_INTERVAL = 10  # seconds before the first status check of a Groq batch job (doubles each check)
+GROQ_BATCH_MAX_POLL_INTERVAL = 120  # seconds - cap on the growing batch poll interval
+GROQ_BATCH_TIMEOUT = 1800  # seconds to wait for a batch before cancelling it and evaluating directly
+LLM_DEDUP_THRESHOLD = 0.85  # Chunks this similar (5-word-shingle Jaccard) share one evaluation
+LLM_MAX_RETRIES = 4  # Retries of 429/5xx/connection errors (jittered backoff, honours Retry-After)
+GROQ_MAX_CONCURRENCY = int(os.getenv("GROQ_MAX_CONCURRENCY", "8"))  # Groq calls in flight per process, across all sessions
+LLM_MIN_UNIQUE_WORDS = 15  # Chunks with fewer distinct words (silence, "you you you") are not sent to the LLM
+LLM_MAX_TRANSCRIPT_TOKENS = 6000  # Per-segment evaluation input cap (head + tail kept)
+LLM_MAX_SUMMARY_TOKENS = 12000  # Full-session summary input cap (head + tail kept)
+LLM_PACK_MAX_SEGMENTS = 8  # evaluate_chunks packs up to this many adjacent chunks (within LLM_MAX_TRANSCRIPT_TOKENS) per call
 
 # Frame Sampling
 FRAME_SAMPLE_INTERVAL = 10  # seconds - sample 1 frame every 10 seconds (reduced processing)
 MAX_FRAMES_PER_MINUTE = 6  # Limit frames to prevent MediaPipe overload
+FRAME_SAMPLER = "ffmpeg"  # "ffmpeg" (fps filter, RGB out) or "opencv" (seek per frame)
+FRAME_KEYFRAMES_ONLY = False  # ffmpeg sampler: decode keyframes only (faster, but long-GOP video repeats one frame across samples)
+VIDEO_HW_DECODE = True  # OpenCV sampler: try GPU decode (NVDEC/VAAPI/...), software otherwise
+FRAME_MAX_WIDTH = 640  # Downscale wider frames while decoding (pose needs no more); 0 disables
 
 # ============================================================================
 # SCORING WEIGHTS
@@ -63,6 +88,18 @@ MAX_SCORE = 100
 TEMP_DIR = "temp_processing"
 UPLOAD_DIR = "uploads"
 
+# Buffer size for streaming uploads to disk
+UPLOAD_COPY_CHUNK_SIZE = 16 * 1024 * 1024  # 16 MiB
+
+# Persistent cache of LLM results, keyed by a hash of the full request.
+# Off by default: requests are sampled (temperature > 0), and caching would
+# replay one sampled score forever. When enabled, requests use temperature 0.
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "").lower() in ("1", "true", "yes")
+LLM_CACHE_DIR = os.path.join(TEMP_DIR, "llm_cache")
+LLM_CACHE_MEMORY_SIZE = 512  # Most recent results also kept in memory
+LLM_CACHE_MAX_ENTRIES = 5000  # Oldest files beyond this are deleted
+LLM_CACHE_MAX_AGE = 7 * 24 * 3600  # Seconds before a stored result expires
+
 # Ensure directories exist
 os.makedirs(TEMP_DIR, exist_ok=True)
 os.makedirs(UPLOAD_DIR, exist_ok=True)
@@ -78,13 +115,22 @@ LAYOUT = "wide"
 
 # Progress update frequency
 PROGRESS_UPDATE_INTERVAL = 1  # Update UI every chunk
+UI_MIN_RENDER_INTERVAL = 0.1  # seconds - cap status redraws at ~10 Hz
+UI_UPDATE_QUEUE_SIZE = 4  # Pipeline updates buffered between worker thread and UI
+UI_RECENT_SEGMENTS = 5  # Transcript snippets kept in the live segment log
 
 # ============================================================================
 # CONTENT EVALUATION PROMPT
 # ============================================================================
 
-# Bilingual prompt for Ollama (Hindi + English)
-CONTENT_EVALUATION_PROMPT = """You are an expert educational content evaluator. Analyze the following transcript from a teaching session and provide scores.
+# Prompts keep all fixed text first and the transcript last, so every
+# request shares a long identical prefix the provider can cache
+
+# System message shared by all evaluation requests
+EVALUATOR_SYSTEM_PROMPT = "You are an expert educational content evaluator. Respond only with valid JSON."
+
+# Bilingual prompt (Hindi + English)
+CONTENT_EVALUATION_PROMPT = """You are an expert educational content evaluator. Analyze the transcript from a teaching session given at the end and provide scores.
 
 The transcript may contain Hindi, English, or Hinglish (mixed). Evaluate based on:
 
@@ -93,9 +139,6 @@ The transcript may contain Hindi, English, or Hinglish (mixed). Evaluate based o
 3. **Technical Accuracy** (0-100): Are concepts explained correctly?
 4. **Engagement** (0-100): Does the teacher use engaging language, examples, or questions?
 
-Transcript:
-{transcript}
-
 Respond ONLY with valid JSON in this exact format:
 {{
   "clarity": <number 0-100>,
@@ -104,24 +147,84 @@ Respond ONLY with valid JSON in this exact format:
   "engagement": <number 0-100>,
   "summary": "<brief 1-2 sentence summary in English>"
 }}
+
+Transcript:
+{transcript}
 """
 
 # Comprehensive summary prompt for entire teaching session
-COMPREHENSIVE_SUMMARY_PROMPT = """You are an expert educational content evaluator. Analyze the following complete transcript from a teaching session and provide a comprehensive summary.
+COMPREHENSIVE_SUMMARY_PROMPT = """You are an expert educational content evaluator. Analyze the complete transcript from a teaching session given at the end and provide a comprehensive summary.
 
 The transcript may contain Hindi, English, or Hinglish (mixed).
 
+Provide a comprehensive analysis in the following JSON format:
+{{
+  "topic": "<what the teacher was trying to explain - 1 sentence>",
+  "what_went_well": "<positive aspects of the teaching - 2-3 sentences>",
+  "improvements": "<specific suggestions for improvement - 2-3 sentences>"
+}}
+
+Respond ONLY with valid JSON.
+
 Full Transcript:
 {transcript}
+"""
 
-Provide a comprehensive analysis in the following JSON format:
+# Scores and session summary in one request, for when both are needed
+# for the same transcript (e.g. a single-segment video)
+FUSED_EVAL_SUMMARY_PROMPT = """You are an expert educational content evaluator. Analyze the complete transcript from a teaching session given at the end, score it, and provide a comprehensive summary.
+
+The transcript may contain Hindi, English, or Hinglish (mixed). Score based on:
+
+1. **Clarity** (0-100): How clear and understandable is the explanation?
+2. **Structure** (0-100): Is the content well-organized with logical flow?
+3. **Technical Accuracy** (0-100): Are concepts explained correctly?
+4. **Engagement** (0-100): Does the teacher use engaging language, examples, or questions?
+
+Respond ONLY with valid JSON in this exact format:
 {{
+  "clarity": <number 0-100>,
+  "structure": <number 0-100>,
+  "technical": <number 0-100>,
+  "engagement": <number 0-100>,
+  "summary": "<brief 1-2 sentence summary in English>",
   "topic": "<what the teacher was trying to explain - 1 sentence>",
   "what_went_well": "<positive aspects of the teaching - 2-3 sentences>",
   "improvements": "<specific suggestions for improvement - 2-3 sentences>"
 }}
 
-Respond ONLY with valid JSON.
+Transcript:
+{transcript}
+"""
+
+# Several numbered transcript segments scored in one request
+PACKED_EVALUATION_PROMPT = """You are an expert educational content evaluator. Analyze the numbered transcript segments from a teaching session given at the end and score each segment independently.
+
+The transcripts may contain Hindi, English, or Hinglish (mixed). Evaluate based on:
+
+1. **Clarity** (0-100): How clear and understandable is the explanation?
+2. **Structure** (0-100): Is the content well-organized with logical flow?
+3. **Technical Accuracy** (0-100): Are concepts explained correctly?
+4. **Engagement** (0-100): Does the teacher use engaging language, examples, or questions?
+
+Respond ONLY with valid JSON in this exact format, one entry per segment, in segment order:
+{{
+  "results": [
+    {{
+      "segment": <segment number>,
+      "clarity": <number 0-100>,
+      "structure": <number 0-100>,
+      "technical": <number 0-100>,
+      "engagement": <number 0-100>,
+      "summary": "<brief 1-2 sentence summary in English>"
+    }}
+  ]
+}}
+
+Transcript segments:
+{transcript}
+
+Return exactly {count} results.
 """
 
 # ============================================================================
@@ -3,11 +3,11 @@ Pipeline Module
 Orchestrates chunked processing of video with progress tracking.
 """
 
-import os
+import math
+import re
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
 import numpy as np
-from typing import Generator, Dict, List
-import librosa
-import soundfile as sf
+from typing import Generator, Dict, List, Optional
 
 from src import config
 from src.core.video_processor import VideoProcessor
@@ -17,6 +17,9 @@ from src.models.speech_to_text import SpeechToText
 from src.models.content_evaluator import ContentEvaluator
 from src.core.scoring_engine import ScoringEngine
 
+# Content evaluation score fields averaged across chunks
+_SCORE_KEYS = ('clarity', 'structure', 'technical', 'engagement')
+
 
 class ProcessingPipeline:
     """
@@ -24,25 +27,28 @@ class ProcessingPipeline:
     Processes video in chunks to ensure scalability and responsive UI.
     """
     
-    def __init__(self, video_path: str):
+    def __init__(self, video_path: str, posture_analyzer: Optional[PostureAnalyzer] = None):
         """
         Initialize processing pipeline.
         
         Args:
             video_path: Path to video file
+            posture_analyzer: Shared analyzer to reuse loaded MediaPipe graphs
+                (a new one is created if omitted)
         """
         self.video_path = video_path
         self.video_processor = VideoProcessor(video_path)
         
         # Initialize analyzers (models loaded lazily)
-        self.posture_analyzer = PostureAnalyzer()
+        # A shared analyzer is owned (and closed) by the caller
+        self._owns_posture_analyzer = posture_analyzer is None
+        self.posture_analyzer = posture_analyzer or PostureAnalyzer()
         self.stt = SpeechToText()
         self.content_evaluator = ContentEvaluator()
         self.scoring_engine = ScoringEngine()
         
         # Results storage
         self.audio_path = None
-        self.frames = None
         self.duration = 0
         self.chunk_results = []
     
@@ -65,94 +71,129 @@ class ProcessingPipeline:
             yield {
                 'stage': 'preprocessing',
                 'progress': 0,
-                'message': 'Extracting audio and sampling frames...'
+                'message': 'Extracting audio...'
             }
             
+            # Frames are streamed into posture analysis rather than held
+            # in memory; they are decoded as the analyzer consumes them
             self.audio_path = self.video_processor.extract_audio()
-            self.frames, self.duration = self.video_processor.sample_frames()
+            frames, self.duration = self.video_processor.stream_frames()
             
             yield {
                 'stage': 'preprocessing',
                 'progress': 10,
-                'message': f'Video preprocessed: {self.duration:.1f}s, {len(self.frames)} frames sampled'
+                'message': f'Audio extracted: {self.duration:.1f}s of video, frames are sampled during posture analysis'
             }
             
-            # Stage 2: Posture analysis
+            # Stage 2 & 3: Posture and audio analysis
+            # Independent (frames vs. WAV) and both spend their time in
+            # native code, so they run side by side and report as they finish
             yield {
                 'stage': 'posture',
                 'progress': 15,
-                'message': 'Analyzing posture...'
+                'message': 'Analyzing posture and audio features...'
             }
             
-            posture_score = self.posture_analyzer.analyze_frames(self.frames)
+            scores = {}
+            with ThreadPoolExecutor(max_workers=2, thread_name_prefix='analysis') as executor:
+                futures = {
+                    executor.submit(self.posture_analyzer.analyze_frames, frames): 'posture',
+                    executor.submit(self._analyze_audio): 'audio'
+                }
+                
+                for completed, future in enumerate(as_completed(futures), start=1):
+                    stage = futures[future]
+                    scores[stage] = future.result()
+                    
+                    yield {
+                        'stage': stage,
+                        'progress': 25 if completed == 1 else 40,
+                        'message': f'{stage.capitalize()} analysis complete: {scores[stage]:.1f}/100'
+                    }
             
-            yield {
-                'stage': 'posture',
-                'progress': 25,
-                'message': f'Posture analysis complete: {posture_score:.1f}/100'
-            }
+            posture_score = scores['posture']
+            audio_score = scores['audio']
             
-            # Stage 3: Audio analysis
-            yield {
-                'stage': 'audio',
-                'progress': 30,
-                'message': 'Analyzing audio features...'
-            }
+            # Stage 4: Chunked transcription and content evaluation
+            # This is the most time-consuming part. Transcription and
+            # evaluation are separate network services, so they run as a
+            # two-stage pipeline: each transcript is handed to the evaluation
+            # pool as soon as it arrives while later chunks keep transcribing.
+            num_chunks = math.ceil(self.duration / config.AUDIO_CHUNK_DURATION)
             
-            audio_analyzer = AudioAnalyzer(self.audio_path)
-            audio_score = audio_analyzer.compute_score()
+            chunk_transcripts = [''] * num_chunks
+            chunk_evaluations = [None] * num_chunks
+            comprehensive_summary = None
+            
+            # A single segment is the whole session: score and summarize it
+            # in one LLM call instead of two
+            fuse_summary = num_chunks == 1
+            evaluate = (
+                self.content_evaluator.evaluate_and_summarize if fuse_summary
+                else self.content_evaluator.evaluate_content
+            )
             
             yield {
-                'stage': 'audio',
+                'stage': 'transcription',
                 'progress': 40,
-                'message': f'Audio analysis complete: {audio_score:.1f}/100'
+                'message': f'Processing {num_chunks} segments...'
             }
             
-            # Stage 4: Chunked transcription and content evaluation
-            # This is the most time-consuming part
-            num_chunks = int(np.ceil(self.duration / config.AUDIO_CHUNK_DURATION))
+            audio_samples, sr = self.video_processor.load_audio_samples()
+            spans = self._chunk_spans(num_chunks, sr)
             
-            chunk_transcripts = []
-            chunk_evaluations = []
-            
-            for chunk_idx in range(num_chunks):
-                start_time = chunk_idx * config.AUDIO_CHUNK_DURATION
-                end_time = min((chunk_idx + 1) * config.AUDIO_CHUNK_DURATION, self.duration)
-                
-                # Progress calculation (40-90% for this stage)
-                chunk_progress = 40 + int(50 * (chunk_idx / num_chunks))
-                
-                yield {
-                    'stage': 'transcription',
-                    'progress': chunk_progress,
-                    'message': f'Processing segment {chunk_idx + 1}/{num_chunks} ({start_time:.0f}s - {end_time:.0f}s)...'
-                }
-                
-                # Extract chunk audio
-                chunk_audio_path = self._extract_audio_chunk(start_time, end_time, chunk_idx)
-                
-                # Transcribe chunk
-                transcript = self.stt.get_full_transcript(chunk_audio_path)
-                chunk_transcripts.append(transcript)
-                
-                # Evaluate content
-                evaluation = self.content_evaluator.evaluate_content(transcript)
-                chunk_evaluations.append(evaluation)
-                
-                # Clean up chunk file
-                if os.path.exists(chunk_audio_path):
-                    os.remove(chunk_audio_path)
+            transcribe_pool = ThreadPoolExecutor(
+                max_workers=config.TRANSCRIPTION_MAX_WORKERS,
+                thread_name_prefix='transcribe'
+            )
+            evaluate_pool = ThreadPoolExecutor(
+                max_workers=config.EVALUATION_MAX_WORKERS,
+                thread_name_prefix='evaluate'
+            )
+            try:
+                # Maps each in-flight future to (stage, chunk index)
+                pending = {}
+                for chunk_idx, (start, end) in enumerate(spans.tolist()):
+                    # Chunk audio is a view into the cached decode, no temp file
+                    future = transcribe_pool.submit(
+                        self.stt.get_full_transcript, audio_samples[start:end]
+                    )
+                    pending[future] = ('transcribe', chunk_idx)
                 
-                yield {
-                    'stage': 'transcription',
-                    'progress': chunk_progress + int(50 / num_chunks),
-                    'message': f'Segment {chunk_idx + 1}/{num_chunks} complete',
-                    'chunk_result': {
-                        'chunk_idx': chunk_idx,
-                        'transcript': transcript[:100] + '...' if len(transcript) > 100 else transcript,
-                        'evaluation': evaluation
-                    }
-                }
+                completed = 0
+                while pending:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        stage, chunk_idx = pending.pop(future)
+                        
+                        if stage == 'transcribe':
+                            transcript = future.result()
+                            chunk_transcripts[chunk_idx] = transcript
+                            future = evaluate_pool.submit(evaluate, transcript)
+                            pending[future] = ('evaluate', chunk_idx)
+                            continue
+                        
+                        evaluation = future.result()
+                        if fuse_summary:
+                            evaluation, comprehensive_summary = evaluation
+                        chunk_evaluations[chunk_idx] = evaluation
+                        transcript = chunk_transcripts[chunk_idx]
+                        completed += 1
+                        
+                        # Progress calculation (40-90% for this stage)
+                        yield {
+                            'stage': 'transcription',
+                            'progress': 40 + int(50 * completed / num_chunks),
+                            'message': f'Segment {chunk_idx + 1}/{num_chunks} complete ({completed}/{num_chunks} done)',
+                            'chunk_result': {
+                                'chunk_idx': chunk_idx,
+                                'transcript': transcript[:100] + '...' if len(transcript) > 100 else transcript,
+                                'evaluation': evaluation
+                            }
+                        }
+            finally:
+                for pool in (transcribe_pool, evaluate_pool):
+                    pool.shutdown(wait=True, cancel_futures=True)
             
             # Stage 5: Aggregate results
             yield {
@@ -165,8 +206,9 @@ class ProcessingPipeline:
             aggregated_content = self._aggregate_evaluations(chunk_evaluations)
             
             # Generate comprehensive summary from full transcript
-            full_transcript = '\n\n'.join(chunk_transcripts)
-            comprehensive_summary = self.content_evaluator.generate_comprehensive_summary(full_transcript)
+            full_transcript = self._merge_transcripts(chunk_transcripts)
+            if comprehensive_summary is None:
+                comprehensive_summary = self.content_evaluator.generate_comprehensive_summary(full_transcript)
             
             # Compute final score
             final_result = self.scoring_engine.compute_final_score(
@@ -202,34 +244,70 @@ class ProcessingPipeline:
                 'error': str(e)
             }
     
-    def _extract_audio_chunk(self, start_time: float, end_time: float, chunk_idx: int) -> str:
+    def _analyze_audio(self) -> float:
+        """Score the audio from the samples the video processor decoded."""
+        y, sr = self.video_processor.load_audio_samples()
+        return AudioAnalyzer(self.audio_path, y, sr).compute_score()
+    
+    def _chunk_spans(self, num_chunks: int, sr: int) -> np.ndarray:
         """
-        Extract a time-based chunk from audio file.
+        Sample ranges of every chunk, computed in one vectorized pass.
+        
+        Each chunk starts AUDIO_CHUNK_OVERLAP seconds into the previous one
+        so no word is cut in half.
         
         Args:
-            start_time: Start time in seconds
-            end_time: End time in seconds
-            chunk_idx: Chunk index for filename
+            num_chunks: Number of chunks
+            sr: Sample rate of the decoded audio
             
         Returns:
-            Path to chunk audio file
+            (num_chunks, 2) int64 array of [start, end) sample indices
+        """
+        starts = np.arange(num_chunks) * float(config.AUDIO_CHUNK_DURATION)
+        ends = np.minimum(starts + config.AUDIO_CHUNK_DURATION, self.duration)
+        starts = np.maximum(starts - config.AUDIO_CHUNK_OVERLAP, 0)
+        
+        return (np.stack([starts, ends], axis=1) * sr).astype(np.int64)
+    
+    @staticmethod
+    def _merge_transcripts(transcripts: List[str], max_overlap_words: int = 8) -> str:
         """
-        # Load full audio
-        y, sr = librosa.load(self.audio_path, sr=config.AUDIO_SAMPLE_RATE, mono=True)
+        Join chunk transcripts, dropping words repeated by the chunk overlap.
         
-        # Extract chunk samples
-        start_sample = int(start_time * sr)
-        end_sample = int(end_time * sr)
-        chunk_audio = y[start_sample:end_sample]
+        Finds the longest run of words (up to max_overlap_words) that ends
+        one transcript and starts the next, ignoring case and punctuation,
+        and removes it from the start of the next transcript.
         
-        # Save chunk
-        chunk_path = os.path.join(
-            config.TEMP_DIR,
-            f"chunk_{chunk_idx}.wav"
-        )
-        sf.write(chunk_path, chunk_audio, sr)
+        Args:
+            transcripts: Chunk transcripts in order
+            max_overlap_words: Longest repeated run to look for
+            
+        Returns:
+            Full transcript
+        """
+        def normalize(word: str) -> str:
+            return re.sub(r'\W+', '', word).lower()
+        
+        merged = []
+        prev_words = []
+        for transcript in transcripts:
+            words = transcript.split()
+            
+            overlap = 0
+            limit = min(max_overlap_words, len(prev_words), len(words))
+            for k in range(limit, 0, -1):
+                tail = [normalize(w) for w in prev_words[-k:]]
+                head = [normalize(w) for w in words[:k]]
+                if tail == head and any(tail):
+                    overlap = k
+                    break
+            
+            text = ' '.join(words[overlap:])
+            if text:
+                merged.append(text)
+            prev_words = words
         
-        return chunk_path
+        return '\n\n'.join(merged)
     
     def _aggregate_evaluations(self, evaluations: List[Dict]) -> Dict:
         """
@@ -254,40 +332,39 @@ class ProcessingPipeline:
                 'summary': 'Content evaluation unavailable'
             }
         
-        # Average scores (no summary - will be generated comprehensively later)
-        aggregated = {
-            'clarity': np.mean([e['clarity'] for e in valid_evals]),
-            'structure': np.mean([e['structure'] for e in valid_evals]),
-            'technical': np.mean([e['technical'] for e in valid_evals]),
-            'engagement': np.mean([e['engagement'] for e in valid_evals])
-        }
+        # Average scores in one pass over an (N, 4) array
+        # (no summary - will be generated comprehensively later)
+        scores = np.fromiter(
+            (e[key] for e in valid_evals for key in _SCORE_KEYS),
+            dtype=np.float64,
+            count=len(_SCORE_KEYS) * len(valid_evals)
+        ).reshape(-1, len(_SCORE_KEYS))
         
-        return aggregated
+        return dict(zip(_SCORE_KEYS, scores.mean(axis=0).tolist()))
     
     def cleanup(self):
-        """Clean up temporary files."""
+        """Clean up temporary files and release owned models."""
         self.video_processor.cleanup()
         
-        # Clean up any remaining chunk files
-        for file in os.listdir(config.TEMP_DIR):
-            if file.startswith('chunk_') and file.endswith('.wav'):
-                try:
-                    os.remove(os.path.join(config.TEMP_DIR, file))
-                except Exception:
-                    pass
+        if self._owns_posture_analyzer:
+            self.posture_analyzer.close()
 
 
-def process_video_pipeline(video_path: str) -> Generator[Dict, None, None]:
+def process_video_pipeline(
+    video_path: str,
+    posture_analyzer: Optional[PostureAnalyzer] = None
+) -> Generator[Dict, None, None]:
     """
     Convenience function to process video through pipeline.
     
     Args:
         video_path: Path to video file
+        posture_analyzer: Optional shared posture analyzer
         
     Yields:
         Progress updates and final result
     """
-    pipeline = ProcessingPipeline(video_path)
+    pipeline = ProcessingPipeline(video_path, posture_analyzer)
     
     try:
         for update in pipeline.process():
@@ -4,10 +4,15 @@ Handles video preprocessing: audio extraction and frame sampling.
 """
 
 import os
+import shutil
+import tempfile
+import threading
+from collections import deque
 import cv2
 import ffmpeg
 import numpy as np
-from typing import List, Tuple
+import soundfile as sf
+from typing import Iterator, List, Tuple
 from src import config
 
 
@@ -27,10 +32,22 @@ class VideoProcessor:
         self.video_path = video_path
         self.video_name = os.path.splitext(os.path.basename(video_path))[0]
         
+        # Private temp dir so concurrent processors never share file names
+        self._tmpdir = tempfile.mkdtemp(prefix='pipe_', dir=config.TEMP_DIR)
+        self.audio_path = os.path.join(
+            self._tmpdir, 
+            f"{self.video_name}_audio.wav"
+        )
+        
+        # Extracted audio, decoded once and shared by all consumers
+        self.audio_samples = None
+        self.audio_sr = None
+        
     def extract_audio(self) -> str:
         """
         Extract audio from video using ffmpeg.
-        Converts to mono, 16kHz WAV format (required by faster-whisper).
+        Converts to mono, 16kHz WAV format (required by faster-whisper),
+        then decodes it into audio_samples/audio_sr.
         
         Returns:
             Path to extracted audio file
@@ -38,10 +55,7 @@ class VideoProcessor:
         Raises:
             Exception: If ffmpeg extraction fails
         """
-        audio_path = os.path.join(
-            config.TEMP_DIR, 
-            f"{self.video_name}_audio.wav"
-        )
+        audio_path = self.audio_path
         
         try:
             # Use ffmpeg-python to extract audio
@@ -61,28 +75,266 @@ class VideoProcessor:
                 .run(quiet=True, capture_stdout=True, capture_stderr=True)
             )
             
-            return audio_path
-            
         except ffmpeg.Error as e:
             error_msg = e.stderr.decode() if e.stderr else str(e)
             raise Exception(f"Audio extraction failed: {error_msg}")
+        
+        self.load_audio_samples()
+        return audio_path
+    
+    def load_audio_samples(self) -> Tuple[np.ndarray, int]:
+        """
+        Decode the extracted audio into memory, once.
+        
+        ffmpeg already wrote 16kHz mono PCM, so this is a plain read.
+        Consumers slice views out of the returned array instead of
+        reading the file again.
+        
+        Returns:
+            Tuple of (float32 mono samples, sample rate)
+        """
+        if self.audio_samples is None:
+            self.audio_samples, self.audio_sr = sf.read(
+                self.audio_path,
+                dtype='float32',
+                always_2d=False
+            )
+        
+        return self.audio_samples, self.audio_sr
     
     def sample_frames(self) -> Tuple[List[np.ndarray], float]:
         """
         Sample frames from video at regular intervals.
         
         Strategy:
-        - Sample 1 frame every FRAME_SAMPLE_INTERVAL seconds
+        - Decode only 1 frame every FRAME_SAMPLE_INTERVAL seconds
+          instead of decoding and discarding the frames in between
         - Limit to MAX_FRAMES_PER_MINUTE to prevent MediaPipe overload
         - This reduces processing time significantly for long videos
         
+        Uses an ffmpeg fps filter when FRAME_SAMPLER is "ffmpeg", falling
+        back to OpenCV seeking if ffmpeg is unavailable or fails.
+        
         Returns:
-            Tuple of (list of sampled frames as numpy arrays, video duration in seconds)
+            Tuple of (list of sampled RGB frames as numpy arrays, video duration in seconds)
             
         Raises:
             Exception: If video cannot be opened
         """
-        cap = cv2.VideoCapture(self.video_path)
+        if config.FRAME_SAMPLER == "ffmpeg":
+            try:
+                return self._sample_frames_ffmpeg()
+            except Exception as e:
+                print(f"Warning: ffmpeg frame sampling failed, using OpenCV: {e}")
+        
+        return self._sample_frames_opencv()
+    
+    def stream_frames(self) -> Tuple[Iterator[np.ndarray], float]:
+        """
+        Sample frames lazily, as the consumer iterates.
+        
+        With the ffmpeg sampler, frames are read off the ffmpeg pipe as they
+        are decoded, so only the frames being analyzed are held in memory
+        and decoding overlaps with analysis. The OpenCV sampler has no
+        streaming mode; it samples up front and iterates the list.
+        
+        Returns:
+            Tuple of (iterator over sampled RGB frames, video duration in seconds)
+            
+        Raises:
+            Exception: If the video cannot be opened
+        """
+        if config.FRAME_SAMPLER == "ffmpeg":
+            try:
+                width, height, duration = self._probe_video()
+                return self._stream_frames_ffmpeg(width, height, duration), duration
+            except Exception as e:
+                print(f"Warning: ffmpeg frame streaming unavailable, using OpenCV: {e}")
+        
+        frames, duration = self._sample_frames_opencv()
+        return iter(frames), duration
+    
+    def _stream_frames_ffmpeg(self, width: int, height: int, duration: float) -> Iterator[np.ndarray]:
+        """
+        Stream ffmpeg-sampled frames, falling back to OpenCV if ffmpeg
+        fails before producing any (as sample_frames does).
+        """
+        frames = self._iter_frames_ffmpeg(width, height, duration)
+        try:
+            first = next(frames, None)
+        except Exception as e:
+            print(f"Warning: ffmpeg frame sampling failed, using OpenCV: {e}")
+            first = None
+        
+        if first is None:
+            yield from self._sample_frames_opencv()[0]
+            return
+        
+        yield first
+        yield from frames
+    
+    @staticmethod
+    def _scaled_size(width: int, height: int) -> Tuple[int, int]:
+        """
+        Frame size after downscaling to at most FRAME_MAX_WIDTH wide.
+        
+        Aspect ratio is kept and the height rounded to an even number.
+        Frames are never upscaled.
+        """
+        if not config.FRAME_MAX_WIDTH or width <= config.FRAME_MAX_WIDTH:
+            return width, height
+        
+        scaled_height = max(2, 2 * round(height * config.FRAME_MAX_WIDTH / width / 2))
+        return config.FRAME_MAX_WIDTH, scaled_height
+    
+    def _sampling_filters(self, video, width: int, height: int):
+        """
+        Apply the fps and downscale filters to an ffmpeg video stream.
+        
+        Returns:
+            Tuple of (filtered stream, output width, output height)
+        """
+        video = video.filter('fps', fps=f'1/{config.FRAME_SAMPLE_INTERVAL}')
+        
+        scaled_width, scaled_height = self._scaled_size(width, height)
+        if (scaled_width, scaled_height) != (width, height):
+            video = video.filter('scale', scaled_width, scaled_height, flags='area')
+        
+        return video, scaled_width, scaled_height
+    
+    @staticmethod
+    def _max_frames(duration: float) -> int:
+        """Frame budget for a video of the given duration (at least 1)."""
+        return max(1, int((duration / 60) * config.MAX_FRAMES_PER_MINUTE))
+    
+    def _probe_video(self) -> Tuple[int, int, float]:
+        """
+        Read frame size and duration with ffprobe.
+        
+        Returns:
+            Tuple of (width, height, duration in seconds) as decoded,
+            i.e. with display rotation applied
+        """
+        probe = ffmpeg.probe(self.video_path)
+        stream = next(s for s in probe['streams'] if s['codec_type'] == 'video')
+        width, height = int(stream['width']), int(stream['height'])
+        
+        # ffmpeg auto-rotates portrait phone videos on decode
+        rotation = int(stream.get('tags', {}).get('rotate', 0))
+        for side_data in stream.get('side_data_list', []):
+            rotation = int(side_data.get('rotation', rotation))
+        if abs(rotation) % 180 == 90:
+            width, height = height, width
+        
+        duration = float(stream.get('duration') or probe['format'].get('duration') or 0)
+        return width, height, duration
+    
+    def _sample_frames_ffmpeg(self) -> Tuple[List[np.ndarray], float]:
+        """
+        Sample frames with ffmpeg's fps filter, emitted as raw RGB.
+        
+        With FRAME_KEYFRAMES_ONLY the decoder skips inter frames
+        (skip_frame=nokey) and the fps filter picks the keyframe nearest
+        each sample point; off by default, since with sparse keyframes most
+        samples would repeat one image. Frames are downscaled and arrive as
+        RGB, so no resize or BGR->RGB pass is needed.
+        """
+        width, height, duration = self._probe_video()
+        frames = list(self._iter_frames_ffmpeg(width, height, duration))
+        
+        if not frames:
+            raise Exception("Frame sampling produced no frames")
+        
+        return frames, duration
+    
+    def _iter_frames_ffmpeg(self, width: int, height: int, duration: float) -> Iterator[np.ndarray]:
+        """
+        Run the ffmpeg sampler and yield each frame as it comes off the pipe.
+        
+        Args:
+            width: Decoded frame width (from _probe_video)
+            height: Decoded frame height
+            duration: Video duration in seconds
+            
+        Yields:
+            Sampled RGB frames
+            
+        Raises:
+            Exception: If ffmpeg exits with an error before producing a
+                frame; a later failure keeps the frames decoded so far
+        """
+        input_args = {'skip_frame': 'nokey'} if config.FRAME_KEYFRAMES_ONLY else {}
+        video, width, height = self._sampling_filters(
+            ffmpeg.input(self.video_path, **input_args).video, width, height
+        )
+        process = (
+            video
+            .output('pipe:', format='rawvideo', pix_fmt='rgb24', vframes=self._max_frames(duration))
+            .global_args('-loglevel', 'error')
+            .run_async(pipe_stdout=True, pipe_stderr=True)
+        )
+        
+        # Drain stderr while frames are read, so a burst of decode errors
+        # can never fill the pipe and stall ffmpeg; only the tail is kept
+        error_lines = deque(maxlen=20)
+        stderr_reader = threading.Thread(
+            target=lambda: error_lines.extend(process.stderr),
+            name='ffmpeg-stderr',
+            daemon=True
+        )
+        stderr_reader.start()
+        
+        frame_size = width * height * 3
+        num_frames = 0
+        try:
+            while True:
+                data = process.stdout.read(frame_size)
+                if len(data) < frame_size:
+                    break
+                num_frames += 1
+                yield np.frombuffer(data, dtype=np.uint8).reshape(height, width, 3)
+        except BaseException:
+            # Consumer stopped early (or failed); don't wait for the decode
+            process.kill()
+            raise
+        finally:
+            process.stdout.close()
+            stderr_reader.join()
+            process.stderr.close()
+            process.wait()
+        
+        if process.returncode != 0:
+            error_output = b''.join(error_lines).decode(errors='replace')
+            if num_frames == 0:
+                raise Exception(f"Frame sampling failed: {error_output}")
+            print(f"Warning: ffmpeg stopped after {num_frames} frames, keeping them: {error_output}")
+    
+    def _open_capture(self) -> cv2.VideoCapture:
+        """
+        Open the video for decoding, with hardware acceleration if possible.
+        
+        Falls back to a plain software-decoding capture if VIDEO_HW_DECODE
+        is off, the OpenCV build lacks the acceleration properties, or the
+        accelerated capture cannot be opened.
+        """
+        if config.VIDEO_HW_DECODE:
+            try:
+                cap = cv2.VideoCapture(
+                    self.video_path,
+                    cv2.CAP_FFMPEG,
+                    (cv2.CAP_PROP_HW_ACCELERATION, cv2.VIDEO_ACCELERATION_ANY)
+                )
+                if cap.isOpened():
+                    return cap
+                cap.release()
+            except (AttributeError, cv2.error):
+                pass
+        
+        return cv2.VideoCapture(self.video_path)
+    
+    def _sample_frames_opencv(self) -> Tuple[List[np.ndarray], float]:
+        """Sample frames by seeking with OpenCV to each sample position."""
+        cap = self._open_capture()
         
         if not cap.isOpened():
             raise Exception(f"Cannot open video file: {self.video_path}")
@@ -93,32 +345,57 @@ class VideoProcessor:
         duration = total_frames / fps if fps > 0 else 0
         
         # Calculate sampling strategy
-        frame_interval = int(fps * config.FRAME_SAMPLE_INTERVAL)
-        max_frames = int((duration / 60) * config.MAX_FRAMES_PER_MINUTE)
+        frame_interval = max(1, int(fps * config.FRAME_SAMPLE_INTERVAL))
+        max_frames = self._max_frames(duration)
         
-        sampled_frames = []
-        frame_count = 0
+        frame_indices = range(0, total_frames, frame_interval)[:max_frames]
         
-        while True:
-            ret, frame = cap.read()
-            if not ret:
-                break
+        # Decode into one preallocated buffer, sized from the first decoded
+        # frame (reported dimensions ignore rotation). Frames that need
+        # downscaling are decoded into a scratch frame and resized into
+        # their slot; the rest are decoded straight into the slot.
+        buffer = None
+        scratch = None
+        n = 0
+        
+        for frame_idx in frame_indices:
+            # Seek to the next sample (decoder restarts from nearest keyframe)
+            if frame_idx > 0:
+                cap.set(cv2.CAP_PROP_POS_FRAMES, frame_idx)
             
-            # Sample frame at intervals
-            if frame_count % frame_interval == 0:
-                # Convert BGR to RGB (MediaPipe expects RGB)
-                frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                sampled_frames.append(frame_rgb)
-                
-                # Stop if we've reached max frames
-                if len(sampled_frames) >= max_frames:
+            if buffer is None:
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                width, height = self._scaled_size(frame.shape[1], frame.shape[0])
+                buffer = np.empty((len(frame_indices), height, width, 3), dtype=np.uint8)
+                if (width, height) != (frame.shape[1], frame.shape[0]):
+                    scratch = frame
+                slot = buffer[n]
+            else:
+                # Bind the slot view once: buffer[n] is a new object each time
+                slot = buffer[n]
+                ret, frame = cap.read(scratch if scratch is not None else slot)
+                if not ret:
                     break
             
-            frame_count += 1
+            if frame is not slot:
+                # Downscale (or fix a mid-stream size change) into the slot
+                cv2.resize(frame, (width, height), dst=slot, interpolation=cv2.INTER_AREA)
+            n += 1
         
         cap.release()
         
-        return sampled_frames, duration
+        if n == 0:
+            return [], duration
+        
+        # Convert BGR to RGB (MediaPipe expects RGB) for all frames in one
+        # in-place call; the stacked frames are viewed as one tall image
+        height, width = buffer.shape[1:3]
+        stacked = buffer[:n].reshape(n * height, width, 3)
+        cv2.cvtColor(stacked, cv2.COLOR_BGR2RGB, dst=stacked)
+        
+        return list(buffer[:n]), duration
     
     def get_video_duration(self) -> float:
         """
@@ -144,16 +421,8 @@ class VideoProcessor:
         """
         Clean up temporary files created during processing.
         """
-        audio_path = os.path.join(
-            config.TEMP_DIR, 
-            f"{self.video_name}_audio.wav"
-        )
-        
-        if os.path.exists(audio_path):
-            try:
-                os.remove(audio_path)
-            except Exception as e:
-                print(f"Warning: Could not remove temporary audio file: {e}")
+        # Everything this processor wrote lives in its own temp dir
+        shutil.rmtree(self._tmpdir, ignore_errors=True)
 
 
 def process_video(video_path: str) -> Tuple[str, List[np.ndarray], float]:
@@ -3,12 +3,403 @@ Content Evaluator Module
 Uses Groq API for fast LLM-based content evaluation.
 """
 
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from groq import Groq
+import copy
+import functools
+import hashlib
+import httpx
+import io
 import json
 import os
-from typing import Dict, Optional
+import threading
+import time
+from types import MappingProxyType
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
 from src import config
 
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+try:
+    import msgspec
+    
+    class _Evaluation(msgspec.Struct, gc=False):
+        """Schema of a chunk evaluation reply; decoded and type-checked in C."""
+        clarity: float
+        structure: float
+        technical: float
+        engagement: float
+        summary: str
+    
+    _decode_evaluation = msgspec.json.Decoder(_Evaluation).decode
+except ImportError:
+    _decode_evaluation = None
+
+try:
+    import h2  # noqa: F401 - lets httpx speak HTTP/2
+    _HTTP2_AVAILABLE = True
+except ImportError:
+    _HTTP2_AVAILABLE = False
+
+# Evaluation score fields, in aggregation order
+_SCORE_KEYS = ('clarity', 'structure', 'technical', 'engagement')
+
+# Fields a parsed LLM response must contain
+_REQUIRED_EVAL_KEYS = frozenset(_SCORE_KEYS + ('summary',))
+_SUMMARY_KEYS = ('topic', 'what_went_well', 'improvements')
+_REQUIRED_SUMMARY_KEYS = frozenset(_SUMMARY_KEYS)
+
+# Caps Groq calls in flight across every evaluator and thread in the process,
+# so concurrent sessions stay under the account's rate limit together
+_groq_slots = threading.BoundedSemaphore(config.GROQ_MAX_CONCURRENCY)
+
+# Groq JSON mode, shared by every request
+_JSON_RESPONSE_FORMAT = {"type": "json_object"}
+
+# Reused for every response; raw_decode parses one value and ignores the rest
+# (requests use JSON mode, so this is normally a plain parse)
+_JSON_DECODER = json.JSONDecoder()
+
+
+def _extract_json(llm_output: str) -> Optional[Dict]:
+    """
+    Parse the first JSON object in an LLM response.
+    
+    JSON-mode replies are a bare object and go straight to the fast
+    parser. Otherwise decoding starts at the first '{' and stops at the
+    end of that object, so surrounding prose is tolerated.
+    
+    Args:
+        llm_output: Raw LLM response
+        
+    Returns:
+        Parsed object or None
+    """
+    try:
+        data = _json_loads(llm_output)
+        return data if isinstance(data, dict) else None
+    except ValueError:
+        pass
+    
+    start = llm_output.find('{')
+    if start == -1:
+        return None
+    
+    try:
+        data, _ = _JSON_DECODER.raw_decode(llm_output, start)
+    except json.JSONDecodeError:
+        return None
+    
+    return data if isinstance(data, dict) else None
+
+
+def _is_evaluable(transcript: str) -> bool:
+    """
+    Check whether a chunk transcript is worth an LLM call.
+    
+    Empty or very short text, and text with fewer than
+    LLM_MIN_UNIQUE_WORDS distinct words (silence transcribed as filler or
+    repeated words), is rejected locally.
+    
+    Args:
+        transcript: Text transcript
+        
+    Returns:
+        True if the transcript should be evaluated
+    """
+    if not transcript or len(transcript.strip()) < 10:
+        return False
+    return len(set(transcript.lower().split())) >= config.LLM_MIN_UNIQUE_WORDS
+
+
+def _estimate_tokens(transcript: str, word_count: Optional[int] = None) -> float:
+    """
+    Estimate the token count of a transcript without a tokenizer.
+    
+    About 1.3 tokens per word, or 4 UTF-8 bytes per token for scripts
+    like Devanagari that tokenize densely, whichever is larger.
+    
+    Args:
+        transcript: Text transcript
+        word_count: Word count, if already known
+        
+    Returns:
+        Estimated token count
+    """
+    if word_count is None:
+        word_count = len(transcript.split())
+    return max(word_count * 1.3, len(transcript.encode('utf-8')) / 4)
+
+
+def _pack_transcripts(transcripts: List[str], max_tokens: float, max_segments: int) -> List[List[int]]:
+    """
+    Greedily group adjacent transcripts into packs under a token budget.
+    
+    A transcript larger than the budget gets a pack of its own.
+    
+    Args:
+        transcripts: Transcript strings
+        max_tokens: Estimated token budget per pack
+        max_segments: Maximum transcripts per pack
+        
+    Returns:
+        Packs of indices into transcripts, in order
+    """
+    packs = []
+    current, current_tokens = [], 0.0
+    
+    for i, transcript in enumerate(transcripts):
+        tokens = _estimate_tokens(transcript)
+        if current and (current_tokens + tokens > max_tokens or len(current) == max_segments):
+            packs.append(current)
+            current, current_tokens = [], 0.0
+        current.append(i)
+        current_tokens += tokens
+    
+    if current:
+        packs.append(current)
+    
+    return packs
+
+
+def _truncate_transcript(transcript: str, max_tokens: int) -> str:
+    """
+    Cap a transcript to roughly max_tokens, keeping its head and tail.
+    
+    Token count is estimated with _estimate_tokens. The middle is dropped
+    so the opening and closing of the session (structure signal) survive.
+    
+    Args:
+        transcript: Text transcript
+        max_tokens: Token budget
+        
+    Returns:
+        Transcript, or its truncated head and tail joined by a marker
+    """
+    words = transcript.split()
+    estimated_tokens = _estimate_tokens(transcript, len(words))
+    
+    if estimated_tokens <= max_tokens:
+        return transcript
+    
+    half = max(1, int(len(words) * max_tokens / estimated_tokens) // 2)
+    return ' '.join(words[:half]) + '\n...[truncated]...\n' + ' '.join(words[-half:])
+
+
+def _near_duplicate_map(transcripts: List[str], threshold: float) -> List[int]:
+    """
+    Map each transcript to the earlier transcript it nearly duplicates.
+    
+    Similarity is the Jaccard index of lower-cased 5-word shingles. Each
+    transcript is compared with the distinct ones before it; chunk lists
+    are short, so the pairwise scan costs far less than one API call.
+    
+    Args:
+        transcripts: Transcript strings
+        threshold: Minimum similarity (0-1) to count as a duplicate
+        
+    Returns:
+        For each transcript, the index of the transcript whose evaluation
+        it reuses (its own index if it is distinct)
+    """
+    mapping = []
+    distinct = []  # (index, shingle set)
+    
+    for i, transcript in enumerate(transcripts):
+        words = (transcript or '').lower().split()
+        shingles = {tuple(words[j:j + 5]) for j in range(max(1, len(words) - 4))}
+        
+        match = i
+        for k, other in distinct:
+            if len(shingles & other) >= threshold * len(shingles | other):
+                match = k
+                break
+        
+        if match == i:
+            distinct.append((i, shingles))
+        mapping.append(match)
+    
+    return mapping
+
+
+def _build_http_client() -> httpx.Client:
+    """
+    Build the HTTP client used for Groq requests.
+    
+    Keeps connections alive between calls, and multiplexes concurrent
+    chunk requests over one HTTP/2 connection when h2 is installed, so
+    parallel evaluation doesn't pay a TCP/TLS handshake per request.
+    
+    Returns:
+        httpx.Client instance
+    """
+    return httpx.Client(
+        http2=_HTTP2_AVAILABLE,
+        limits=httpx.Limits(
+            max_keepalive_connections=32,
+            max_connections=64,
+            keepalive_expiry=30.0
+        ),
+        timeout=httpx.Timeout(60.0, connect=5.0)
+    )
+
+
+class ResponseCache:
+    """
+    On-disk cache of LLM results, one JSON file per request, fronted by
+    an in-memory LRU shared by all instances.
+    
+    Keys hash the full request (model, messages, sampling parameters),
+    so editing a prompt or switching models never serves stale results.
+    """
+    
+    # Keys identify the request itself, so every instance can share one LRU
+    _memory = OrderedDict()
+    _memory_lock = threading.Lock()
+    
+    def __init__(
+        self,
+        cache_dir: str = config.LLM_CACHE_DIR,
+        memory_size: int = config.LLM_CACHE_MEMORY_SIZE,
+        max_entries: int = config.LLM_CACHE_MAX_ENTRIES,
+        max_age: float = config.LLM_CACHE_MAX_AGE
+    ):
+        """
+        Initialize response cache.
+        
+        Args:
+            cache_dir: Directory holding the cached results
+            memory_size: Results kept in the shared in-memory LRU
+            max_entries: Result files kept on disk before the oldest are deleted
+            max_age: Seconds before a stored result expires
+        """
+        self.cache_dir = cache_dir
+        self.memory_size = memory_size
+        self.max_entries = max_entries
+        self.max_age = max_age
+        
+        # Prune at startup, then again after every tenth of the cap in writes
+        self._prune_every = max(1, max_entries // 10)
+        self._writes = 0
+        self._prune_lock = threading.Lock()
+        self.prune()
+    
+    @staticmethod
+    def key(request: Dict) -> str:
+        """
+        Build the cache key for a chat completion request.
+        
+        Args:
+            request: Keyword arguments for chat.completions.create
+            
+        Returns:
+            BLAKE2b hex digest used as cache file name
+        """
+        payload = json.dumps(request, sort_keys=True, ensure_ascii=False).encode('utf-8')
+        return hashlib.blake2b(payload, digest_size=16).hexdigest()
+    
+    def get(self, key: str) -> Optional[Dict]:
+        """
+        Load a cached result.
+        
+        Args:
+            key: Cache key
+            
+        Returns:
+            Cached result dict or None on miss
+        """
+        with self._memory_lock:
+            result = self._memory.get(key)
+            if result is not None:
+                self._memory.move_to_end(key)
+                # Results nest dicts (fused, packed), so copy all the way down
+                return copy.deepcopy(result)
+        
+        path = os.path.join(self.cache_dir, f"{key}.json")
+        try:
+            if time.time() - os.path.getmtime(path) > self.max_age:
+                return None
+            with open(path, 'rb') as f:
+                result = _json_loads(f.read())
+        except (OSError, ValueError):
+            return None
+        
+        self._remember(key, result)
+        return result
+    
+    def put(self, key: str, result: Dict):
+        """
+        Store a successful result.
+        
+        Args:
+            key: Cache key
+            result: Validated result dict
+        """
+        self._remember(key, result)
+        
+        path = os.path.join(self.cache_dir, f"{key}.json")
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(result, f)
+            # Atomic rename so concurrent readers never see partial files
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Warning: Could not write LLM response cache: {e}")
+            return
+        
+        with self._prune_lock:
+            self._writes += 1
+            due = self._writes >= self._prune_every
+            if due:
+                self._writes = 0
+        if due:
+            self.prune()
+    
+    def prune(self):
+        """
+        Delete expired result files and the oldest ones beyond max_entries.
+        """
+        now = time.time()
+        entries = []
+        try:
+            with os.scandir(self.cache_dir) as it:
+                for entry in it:
+                    if not entry.name.endswith('.json'):
+                        continue
+                    try:
+                        entries.append((entry.stat().st_mtime, entry.path))
+                    except OSError:
+                        continue
+        except OSError:
+            return
+        
+        entries.sort(reverse=True)
+        for i, (mtime, path) in enumerate(entries):
+            if i < self.max_entries and now - mtime <= self.max_age:
+                continue
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+    
+    def _remember(self, key: str, result: Dict):
+        """Keep a deep copy of a result in the in-memory LRU."""
+        if self.memory_size <= 0:
+            return
+        
+        with self._memory_lock:
+            self._memory[key] = copy.deepcopy(result)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_size:
+                self._memory.popitem(last=False)
+
 
 class ContentEvaluator:
     """
@@ -17,10 +408,59 @@ class ContentEvaluator:
     Supports bilingual evaluation (Hindi + English).
     """
     
-    def __init__(self):
-        """Initialize content evaluator."""
+    # Neutral results, copied and completed with an error message on failure
+    _NEUTRAL_EVAL = MappingProxyType({
+        'clarity': 50,
+        'structure': 50,
+        'technical': 50,
+        'engagement': 50,
+        'summary': 'Evaluation unavailable',
+        'success': False
+    })
+    _NEUTRAL_SUMMARY = MappingProxyType({
+        'topic': 'Summary unavailable',
+        'what_went_well': 'Unable to generate summary',
+        'improvements': 'Unable to generate summary',
+        'success': False
+    })
+    
+    def __init__(self, use_cache: bool = config.LLM_CACHE_ENABLED):
+        """
+        Initialize content evaluator.
+        
+        Args:
+            use_cache: Reuse stored results for previously seen requests
+        """
         self.client = None
         self.model = "llama-3.1-8b-instant"  # Fast Groq model
+        self.cache = ResponseCache() if use_cache else None
+        
+        # Transcript-independent request parts, built once
+        self._system_message = {"role": "system", "content": config.EVALUATOR_SYSTEM_PROMPT}
+        self._format_evaluation_prompt = config.CONTENT_EVALUATION_PROMPT.format
+        self._format_summary_prompt = config.COMPREHENSIVE_SUMMARY_PROMPT.format
+        self._format_fused_prompt = config.FUSED_EVAL_SUMMARY_PROMPT.format
+        self._format_packed_prompt = config.PACKED_EVALUATION_PROMPT.format
+        
+        # GROQ_API_KEY, read from the environment on first use
+        self._api_key: Optional[str] = None
+        self._api_key_checked = False
+    
+    def _get_api_key(self) -> Optional[str]:
+        """Return GROQ_API_KEY, reading the environment only once."""
+        if not self._api_key_checked:
+            self._api_key = os.getenv("GROQ_API_KEY")
+            self._api_key_checked = True
+        return self._api_key
+    
+    def refresh_api_key(self):
+        """
+        Re-read GROQ_API_KEY on next use and drop the current client.
+        
+        Call after changing the environment variable at runtime.
+        """
+        self._api_key_checked = False
+        self.client = None
     
     def get_groq_client(self) -> Groq:
         """
@@ -33,15 +473,36 @@ class ContentEvaluator:
             ValueError: If GROQ_API_KEY is not set
         """
         if self.client is None:
-            api_key = os.getenv("GROQ_API_KEY")
+            api_key = self._get_api_key()
             if not api_key:
                 raise ValueError(
                     "GROQ_API_KEY environment variable not set. "
                     "Get your free key at: https://console.groq.com/keys"
                 )
-            self.client = Groq(api_key=api_key)
+            # The SDK retries rate limits, 5xx and connection errors with
+            # jittered exponential backoff and honours Retry-After, so a
+            # transient failure doesn't turn into a neutral chunk score
+            self.client = Groq(
+                api_key=api_key,
+                http_client=_build_http_client(),
+                max_retries=config.LLM_MAX_RETRIES
+            )
         return self.client
     
+    def _create_completion(self, request: Dict):
+        """
+        Run a chat completion once a process-wide Groq slot is free.
+        
+        Args:
+            request: Keyword arguments for chat.completions.create
+            
+        Returns:
+            Groq chat completion
+        """
+        client = self.get_groq_client()
+        with _groq_slots:
+            return client.chat.completions.create(**request)
+    
     def check_groq_available(self) -> bool:
         """
         Check if Groq API key is set.
@@ -49,7 +510,7 @@ class ContentEvaluator:
         Returns:
             True if API key is available, False otherwise
         """
-        return os.getenv("GROQ_API_KEY") is not None
+        return self._get_api_key() is not None
     
     def evaluate_content(self, transcript: str) -> Dict[str, any]:
         """
@@ -69,42 +530,38 @@ class ContentEvaluator:
             - error: Optional error message
         """
         if not transcript or len(transcript.strip()) < 10:
-            return {
-                'clarity': 50,
-                'structure': 50,
-                'technical': 50,
-                'engagement': 50,
-                'summary': 'Insufficient content for evaluation',
-                'success': False,
-                'error': 'Transcript too short'
-            }
+            response = self._error_response('Transcript too short')
+            response['summary'] = 'Insufficient content for evaluation'
+            return response
         
-        # Build prompt
-        prompt = config.CONTENT_EVALUATION_PROMPT.format(transcript=transcript)
+        if not _is_evaluable(transcript):
+            response = self._error_response('Low-information transcript')
+            response['summary'] = 'Insufficient content for evaluation'
+            return response
+        
+        request = self._evaluation_request(transcript)
+        
+        # Check cache before paying for an API round trip
+        cache_key = ResponseCache.key(request)
+        if self.cache is not None:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return cached
         
         try:
-            # Get Groq client
-            client = self.get_groq_client()
-            
             # Call Groq API (much faster than Ollama)
-            response = client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": "You are an expert educational content evaluator. Respond only with valid JSON."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.3,
-                max_tokens=500
-            )
+            response = self._create_completion(request)
             
             # Parse response
             llm_output = response.choices[0].message.content
             
             # Extract JSON from response
-            evaluation = self._parse_json_response(llm_output)
+            evaluation = self._parse_evaluation(llm_output)
             
             if evaluation:
                 evaluation['success'] = True
+                if self.cache is not None:
+                    self.cache.put(cache_key, evaluation)
                 return evaluation
             else:
                 return self._error_response("Failed to parse LLM response")
@@ -112,34 +569,102 @@ class ContentEvaluator:
         except Exception as e:
             return self._error_response(f"Groq API error: {str(e)}")
     
-    def _parse_json_response(self, llm_output: str) -> Optional[Dict]:
+    def _evaluation_request(self, transcript: str) -> Dict:
         """
-        Parse JSON from LLM output.
+        Build the chat completion parameters for evaluating a transcript.
+        
+        Shared by direct calls and Batch API request lines.
         
         Args:
-            llm_output: Raw LLM response
+            transcript: Text transcript
             
         Returns:
-            Parsed evaluation dict or None
+            Keyword arguments for chat.completions.create
         """
-        try:
-            # Try direct JSON parse first
-            data = json.loads(llm_output)
-            return self._validate_evaluation(data)
-        except json.JSONDecodeError:
-            # Try to extract JSON from text
-            start = llm_output.find('{')
-            end = llm_output.rfind('}')
+        return self._build_request(
+            self._format_evaluation_prompt,
+            transcript,
+            config.LLM_MAX_TRANSCRIPT_TOKENS,
+            max_tokens=250  # Four scores and a 1-2 sentence summary
+        )
+    
+    def _build_request(
+        self,
+        format_prompt: Callable[..., str],
+        transcript: str,
+        max_transcript_tokens: int,
+        max_tokens: int
+    ) -> Dict:
+        """
+        Build chat completion parameters around a prompt template.
+        
+        Only the user message depends on the transcript; the system
+        message and prompt formatter are prebuilt in __init__.
+        
+        Args:
+            format_prompt: Bound format method of the prompt template
+            transcript: Text transcript
+            max_transcript_tokens: Token budget for the transcript
+            max_tokens: Completion token limit
             
-            if start != -1 and end != -1:
-                json_str = llm_output[start:end+1]
-                try:
-                    data = json.loads(json_str)
-                    return self._validate_evaluation(data)
-                except json.JSONDecodeError:
-                    pass
+        Returns:
+            Keyword arguments for chat.completions.create
+        """
+        prompt = format_prompt(transcript=_truncate_transcript(transcript, max_transcript_tokens))
         
-        return None
+        return {
+            'model': self.model,
+            'messages': [self._system_message, {"role": "user", "content": prompt}],
+            # Cached results are replayed, so only cache deterministic output
+            'temperature': 0 if self.cache is not None else 0.3,
+            'max_tokens': max_tokens,
+            'response_format': _JSON_RESPONSE_FORMAT
+        }
+    
+    def _parse_evaluation(self, llm_output: str) -> Optional[Dict]:
+        """
+        Parse and validate a chunk evaluation reply.
+        
+        With msgspec installed, a bare JSON reply of the expected shape is
+        decoded and type-checked in one call; anything else (prose around
+        the object, numbers as strings) takes the generic path.
+        
+        Args:
+            llm_output: Raw LLM response
+            
+        Returns:
+            Validated dict or None
+        """
+        if _decode_evaluation is not None:
+            try:
+                e = _decode_evaluation(llm_output)
+            except ValueError:
+                pass
+            else:
+                return {
+                    'clarity': max(0.0, min(100.0, e.clarity)),
+                    'structure': max(0.0, min(100.0, e.structure)),
+                    'technical': max(0.0, min(100.0, e.technical)),
+                    'engagement': max(0.0, min(100.0, e.engagement)),
+                    'summary': e.summary
+                }
+        
+        return self._parse_json(llm_output, self._validate_evaluation)
+    
+    @staticmethod
+    def _parse_json(llm_output: str, validator: Callable[[Dict], Optional[Dict]]) -> Optional[Dict]:
+        """
+        Parse JSON from LLM output.
+        
+        Args:
+            llm_output: Raw LLM response
+            validator: _validate_evaluation or _validate_summary
+            
+        Returns:
+            Validated dict or None
+        """
+        data = _extract_json(llm_output)
+        return validator(data) if data is not None else None
     
     def _validate_evaluation(self, data: Dict) -> Optional[Dict]:
         """
@@ -151,18 +676,14 @@ class ContentEvaluator:
         Returns:
             Validated dict or None
         """
-        required_keys = ['clarity', 'structure', 'technical', 'engagement', 'summary']
-        
-        if not all(key in data for key in required_keys):
+        if not _REQUIRED_EVAL_KEYS.issubset(data):
             return None
         
         # Normalize scores to 0-100 range
-        for key in ['clarity', 'structure', 'technical', 'engagement']:
-            try:
-                score = float(data[key])
-                data[key] = max(0, min(100, score))
-            except (ValueError, TypeError):
-                return None
+        try:
+            data.update({key: max(0.0, min(100.0, float(data[key]))) for key in _SCORE_KEYS})
+        except (ValueError, TypeError):
+            return None
         
         if not isinstance(data['summary'], str):
             data['summary'] = str(data['summary'])
@@ -171,22 +692,28 @@ class ContentEvaluator:
     
     def _error_response(self, error_msg: str) -> Dict:
         """Generate error response with neutral scores."""
-        return {
-            'clarity': 50,
-            'structure': 50,
-            'technical': 50,
-            'engagement': 50,
-            'summary': 'Evaluation unavailable',
-            'success': False,
-            'error': error_msg
-        }
+        response = dict(self._NEUTRAL_EVAL)
+        response['error'] = error_msg
+        return response
     
-    def evaluate_chunks(self, transcripts: list) -> Dict[str, any]:
+    def evaluate_chunks(
+        self,
+        transcripts: list,
+        max_concurrency: int = config.EVALUATION_MAX_WORKERS
+    ) -> Dict[str, any]:
         """
         Evaluate multiple transcript chunks and aggregate.
         
+        Adjacent chunks are packed into shared requests (up to
+        LLM_PACK_MAX_SEGMENTS within LLM_MAX_TRANSCRIPT_TOKENS) and the
+        packs are evaluated concurrently (the calls are network-bound),
+        so latency is roughly that of the slowest call rather than the sum.
+        Near-duplicate chunks (see LLM_DEDUP_THRESHOLD) are evaluated once
+        and share the result.
+        
         Args:
             transcripts: List of transcript strings
+            max_concurrency: Maximum API calls in flight at once
             
         Returns:
             Aggregated evaluation scores
@@ -194,295 +721,417 @@ class ContentEvaluator:
         if not transcripts:
             return self._error_response("No transcripts provided")
         
-        evaluations = []
+        mapping = _near_duplicate_map(transcripts, config.LLM_DEDUP_THRESHOLD)
+        distinct = sorted(set(mapping))
+        texts = [transcripts[i] for i in distinct]
+        packs = _pack_transcripts(texts, config.LLM_MAX_TRANSCRIPT_TOKENS, config.LLM_PACK_MAX_SEGMENTS)
         
-        for transcript in transcripts:
-            eval_result = self.evaluate_content(transcript)
-            if eval_result.get('success', False):
-                evaluations.append(eval_result)
+        with ThreadPoolExecutor(
+            max_workers=max(1, min(max_concurrency, len(packs))),
+            thread_name_prefix='evaluate'
+        ) as executor:
+            # Packs are contiguous and in order, so flattening restores it
+            results = [
+                evaluation
+                for pack_results in executor.map(
+                    self._evaluate_pack, [[texts[j] for j in pack] for pack in packs]
+                )
+                for evaluation in pack_results
+            ]
         
-        if not evaluations:
-            return self._error_response("All chunk evaluations failed")
+        evaluated = dict(zip(distinct, results))
+        return self._aggregate_evaluations(evaluated[i] for i in mapping)
+    
+    def _evaluate_pack(self, transcripts: List[str]) -> List[Dict]:
+        """
+        Evaluate a pack of transcripts, in one request where possible.
         
-        # Aggregate scores (average)
-        aggregated = {
-            'clarity': sum(e['clarity'] for e in evaluations) / len(evaluations),
-            'structure': sum(e['structure'] for e in evaluations) / len(evaluations),
-            'technical': sum(e['technical'] for e in evaluations) / len(evaluations),
-            'engagement': sum(e['engagement'] for e in evaluations) / len(evaluations),
-            'summary': ' '.join(e['summary'] for e in evaluations),
-            'success': True
-        }
+        Transcripts not worth evaluating are rejected locally. Any
+        transcript the packed reply does not cover is evaluated on its own.
         
-        return aggregated
-
-
-    def generate_comprehensive_summary(self, full_transcript: str) -> Dict[str, str]:
+        Args:
+            transcripts: Transcript strings
+            
+        Returns:
+            Evaluation dict per transcript, in input order
         """
-        Generate a comprehensive summary of the entire teaching session.
+        results = [None] * len(transcripts)
+        packed = [i for i, t in enumerate(transcripts) if _is_evaluable(t)]
+        
+        if len(packed) > 1:
+            evaluations = self._request_pack([transcripts[i] for i in packed])
+            for i, evaluation in zip(packed, evaluations):
+                results[i] = evaluation
+        
+        return [
+            result if result is not None else self.evaluate_content(transcript)
+            for result, transcript in zip(results, transcripts)
+        ]
+    
+    def _request_pack(self, transcripts: List[str]) -> List[Optional[Dict]]:
+        """
+        Score several transcripts with one PACKED_EVALUATION_PROMPT request.
         
         Args:
-            full_transcript: Complete transcript of all chunks
+            transcripts: Transcript strings (at least two)
             
+        Results are matched to transcripts by their "segment" number, not
+        by position; a segment that is missing, out of range or reported
+        more than once is left as None.
+        
         Returns:
-            Dictionary with:
-            - topic: What the teacher was trying to explain
-            - what_went_well: Positive aspects of the teaching
-            - improvements: Specific suggestions for improvement
-            - success: bool (whether generation succeeded)
-            - error: Optional error message
+            Evaluation dict per transcript, None where the reply was unusable
         """
-        if not full_transcript or len(full_transcript.strip()) < 10:
-            return {
-                'topic': 'Insufficient content',
-                'what_went_well': 'N/A',
-                'improvements': 'N/A',
-                'success': False,
-                'error': 'Transcript too short'
-            }
+        segments = '\n\n'.join(f"[{n}]\n{t}" for n, t in enumerate(transcripts, 1))
+        request = self._build_request(
+            functools.partial(self._format_packed_prompt, count=len(transcripts)),
+            segments,
+            # Packs are already within budget; leave room for the markers
+            config.LLM_MAX_TRANSCRIPT_TOKENS + 8 * len(transcripts),
+            max_tokens=150 * len(transcripts)
+        )
         
-        # Build prompt
-        prompt = config.COMPREHENSIVE_SUMMARY_PROMPT.format(transcript=full_transcript)
+        cache_key = ResponseCache.key(request)
+        if self.cache is not None:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return cached['results']
         
+        unusable = [None] * len(transcripts)
         try:
-            # Get Groq client
-            client = self.get_groq_client()
-            
-            # Call Groq API
-            response = client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": "You are an expert educational content evaluator. Respond only with valid JSON."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.3,
-                max_tokens=800  # More tokens for comprehensive summary
-            )
-            
-            # Parse response
-            llm_output = response.choices[0].message.content
-            
-            # Extract JSON from response
-            summary = self._parse_summary_response(llm_output)
-            
-            if summary:
-                summary['success'] = True
-                return summary
-            else:
-                return self._error_summary_response("Failed to parse LLM response")
-                
+            response = self._create_completion(request)
         except Exception as e:
-            return self._error_summary_response(f"Groq API error: {str(e)}")
+            print(f"Warning: Packed evaluation failed, evaluating chunks separately: {e}")
+            return unusable
+        
+        data = _extract_json(response.choices[0].message.content)
+        items = data.get('results') if data is not None else None
+        if not isinstance(items, list):
+            return unusable
+        
+        # Index results by segment number; duplicates make a segment unusable
+        by_segment = {}
+        duplicated = set()
+        for item in items:
+            if not isinstance(item, dict):
+                continue
+            try:
+                segment = int(item.get('segment'))
+            except (TypeError, ValueError):
+                continue
+            if segment in by_segment:
+                duplicated.add(segment)
+            by_segment[segment] = item
+        
+        evaluations = []
+        for segment in range(1, len(transcripts) + 1):
+            item = by_segment.get(segment)
+            evaluation = None
+            if item is not None and segment not in duplicated:
+                evaluation = self._validate_evaluation(
+                    {key: item[key] for key in _REQUIRED_EVAL_KEYS if key in item}
+                )
+            if evaluation:
+                evaluation['success'] = True
+            evaluations.append(evaluation)
+        
+        if self.cache is not None and all(evaluations):
+            self.cache.put(cache_key, {'results': evaluations})
+        
+        return evaluations
     
-    def _parse_summary_response(self, llm_output: str) -> Optional[Dict]:
+    def evaluate_chunks_batch(
+        self,
+        transcripts: list,
+        completion_window: str = "24h",
+        poll_interval: float = config.GROQ_BATCH_POLL_INTERVAL,
+        timeout: float = config.GROQ_BATCH_TIMEOUT
+    ) -> Dict[str, any]:
         """
-        Parse JSON from LLM output for comprehensive summary.
+        Evaluate multiple transcript chunks through the Groq Batch API.
+        
+        All chunks go up as one JSONL batch job, which is billed at a
+        discount and does not count against synchronous rate limits, but
+        completes asynchronously (anywhere up to completion_window). Meant
+        for offline re-scoring, not the interactive pipeline. Falls back
+        to evaluate_chunks if the batch cannot be run or has not finished
+        within timeout (the batch is then cancelled). Near-duplicate
+        chunks are sent once and share the result.
         
         Args:
-            llm_output: Raw LLM response
+            transcripts: List of transcript strings
+            completion_window: Batch completion window (e.g. "24h")
+            poll_interval: Seconds before the first status check; doubles
+                after each check, up to GROQ_BATCH_MAX_POLL_INTERVAL
+            timeout: Seconds to wait for the batch before falling back
             
         Returns:
-            Parsed summary dict or None
+            Aggregated evaluation scores
         """
+        if not transcripts:
+            return self._error_response("No transcripts provided")
+        
+        mapping = _near_duplicate_map(transcripts, config.LLM_DEDUP_THRESHOLD)
+        distinct = sorted(set(mapping))
+        
         try:
-            # Try direct JSON parse first
-            data = json.loads(llm_output)
-            return self._validate_summary(data)
-        except json.JSONDecodeError:
-            # Try to extract JSON from text
-            start = llm_output.find('{')
-            end = llm_output.rfind('}')
-            
-            if start != -1 and end != -1:
-                json_str = llm_output[start:end+1]
-                try:
-                    data = json.loads(json_str)
-                    return self._validate_summary(data)
-                except json.JSONDecodeError:
-                    pass
+            results = self._run_evaluation_batch(
+                [transcripts[i] for i in distinct], completion_window, poll_interval, timeout
+            )
+        except Exception as e:
+            print(f"Warning: Groq batch evaluation failed, evaluating directly: {e}")
+            return self.evaluate_chunks(transcripts)
         
-        return None
+        evaluated = dict(zip(distinct, results))
+        return self._aggregate_evaluations(evaluated[i] for i in mapping)
     
-    def _validate_summary(self, data: Dict) -> Optional[Dict]:
+    def _run_evaluation_batch(
+        self,
+        transcripts: list,
+        completion_window: str,
+        poll_interval: float,
+        timeout: float
+    ) -> List[Dict]:
         """
-        Validate comprehensive summary data.
+        Submit a batch job for the transcripts and wait for its results.
+        
+        Transcripts not worth evaluating or already cached are resolved
+        locally and left out of the batch.
         
-        Args:
-            data: Parsed JSON data
-            
         Returns:
-            Validated dict or None
+            Evaluation dict per transcript, in input order
+            
+        Raises:
+            Exception: If the batch cannot be created, does not complete,
+                or is still running after timeout (it is cancelled first)
         """
-        required_keys = ['topic', 'what_went_well', 'improvements']
+        results = [None] * len(transcripts)
+        cache_keys = {}
+        lines = []
         
-        if not all(key in data for key in required_keys):
-            return None
+        for i, transcript in enumerate(transcripts):
+            if not _is_evaluable(transcript):
+                # Rejected locally, no API call
+                results[i] = self.evaluate_content(transcript)
+                continue
+            request = self._evaluation_request(transcript)
+            cache_keys[i] = ResponseCache.key(request)
+            if self.cache is not None:
+                results[i] = self.cache.get(cache_keys[i])
+                if results[i] is not None:
+                    continue
+            
+            lines.append(json.dumps({
+                'custom_id': f"chunk-{i}",
+                'method': 'POST',
+                'url': '/v1/chat/completions',
+                'body': request
+            }))
         
-        # Ensure all values are strings
-        for key in required_keys:
-            if not isinstance(data[key], str):
-                data[key] = str(data[key])
+        if not lines:
+            return results
         
-        return data
-    
-    def _error_summary_response(self, error_msg: str) -> Dict:
-        """Generate error response for comprehensive summary."""
-        return {
-            'topic': 'Summary unavailable',
-            'what_went_well': 'Unable to generate summary',
-            'improvements': 'Unable to generate summary',
-            'success': False,
-            'error': error_msg
-        }
-
-
-
-def evaluate_transcript(transcript: str) -> Dict[str, any]:
-    """
-    Convenience function to evaluate a transcript.
-    
-    Args:
-        transcript: Text transcript
+        client = self.get_groq_client()
+        batch_file = client.files.create(
+            file=("chunks.jsonl", '\n'.join(lines).encode('utf-8')),
+            purpose="batch"
+        )
+        batch = client.batches.create(
+            input_file_id=batch_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window=completion_window
+        )
         
-    Returns:
-        Evaluation scores and summary
-    """
-    evaluator = ContentEvaluator()
-    return evaluator.evaluate_content(transcript)
-
-    """
-    Evaluates teaching content using Ollama LLM.
-    Supports bilingual evaluation (Hindi + English).
-    """
-    
-    def __init__(self):
-        """Initialize content evaluator."""
-        self.base_url = config.OLLAMA_BASE_URL
-        self.model = config.OLLAMA_MODEL
-        self.timeout = config.OLLAMA_TIMEOUT
+        deadline = time.monotonic() + timeout
+        while batch.status not in ('completed', 'failed', 'expired', 'cancelled'):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                try:
+                    client.batches.cancel(batch.id)
+                except Exception as e:
+                    print(f"Warning: Could not cancel Groq batch {batch.id}: {e}")
+                raise Exception(f"Batch {batch.id} did not finish within {timeout:g}s")
+            
+            # Exponential backoff between status checks, never past the deadline
+            time.sleep(min(poll_interval, remaining))
+            poll_interval = min(poll_interval * 2, config.GROQ_BATCH_MAX_POLL_INTERVAL)
+            batch = client.batches.retrieve(batch.id)
+        
+        if batch.status != 'completed' or not batch.output_file_id:
+            raise Exception(f"Batch {batch.id} ended with status '{batch.status}'")
+        
+        output = client.files.content(batch.output_file_id).read().decode('utf-8')
+        for line in output.splitlines():
+            if not line.strip():
+                continue
+            
+            item = _json_loads(line)
+            i = int(item['custom_id'].split('-', 1)[1])
+            response = item.get('response') or {}
+            
+            if response.get('status_code') != 200:
+                results[i] = self._error_response(f"Groq batch error: {item.get('error') or response.get('status_code')}")
+                continue
+            
+            llm_output = response['body']['choices'][0]['message']['content']
+            evaluation = self._parse_evaluation(llm_output)
+            if evaluation:
+                evaluation['success'] = True
+                if self.cache is not None:
+                    self.cache.put(cache_keys[i], evaluation)
+                results[i] = evaluation
+            else:
+                results[i] = self._error_response("Failed to parse LLM response")
+        
+        # Requests the batch dropped (reported only in its error file)
+        return [r if r is not None else self._error_response("No batch result") for r in results]
     
-    def check_ollama_available(self) -> bool:
+    def _aggregate_evaluations(self, results: Iterable[Dict]) -> Dict[str, any]:
         """
-        Check if Ollama is running and accessible.
+        Average the successful evaluations.
         
+        Scores are folded into running means as results arrive, so the
+        evaluations themselves are never collected into a list.
+        
+        Args:
+            results: Evaluation dicts (failed ones are skipped)
+            
         Returns:
-            True if Ollama is available, False otherwise
+            Aggregated evaluation scores
         """
-        try:
-            response = requests.get(
-                f"{self.base_url}/api/tags",
-                timeout=5
-            )
-            return response.status_code == 200
-        except Exception:
-            return False
-    
-    def evaluate_content(self, transcript: str) -> Dict[str, any]:
+        running = dict.fromkeys(_SCORE_KEYS, 0.0)
+        n = 0
+        summary_buf = io.StringIO()
+        
+        for e in results:
+            if not e.get('success', False):
+                continue
+            n += 1
+            inv_n = 1.0 / n
+            for key in _SCORE_KEYS:
+                running[key] += (e[key] - running[key]) * inv_n
+            summary_buf.write(e['summary'])
+            summary_buf.write(' ')
+        
+        if n == 0:
+            return self._error_response("All chunk evaluations failed")
+        
+        return {**running, 'summary': summary_buf.getvalue().rstrip(), 'success': True}
+
+
+    def generate_comprehensive_summary(self, full_transcript: str) -> Dict[str, str]:
         """
-        Evaluate teaching content from transcript.
+        Generate a comprehensive summary of the entire teaching session.
         
         Args:
-            transcript: Text transcript of teaching session
+            full_transcript: Complete transcript of all chunks
             
         Returns:
             Dictionary with:
-            - clarity: 0-100
-            - structure: 0-100
-            - technical: 0-100
-            - engagement: 0-100
-            - summary: Brief summary text
-            - success: bool (whether evaluation succeeded)
+            - topic: What the teacher was trying to explain
+            - what_went_well: Positive aspects of the teaching
+            - improvements: Specific suggestions for improvement
+            - success: bool (whether generation succeeded)
             - error: Optional error message
         """
-        if not transcript or len(transcript.strip()) < 10:
-            # Too short to evaluate meaningfully
-            return {
-                'clarity': 50,
-                'structure': 50,
-                'technical': 50,
-                'engagement': 50,
-                'summary': 'Insufficient content for evaluation',
-                'success': False,
-                'error': 'Transcript too short'
-            }
+        if not full_transcript or len(full_transcript.strip()) < 10:
+            return self._insufficient_summary_response()
         
         # Build prompt
-        prompt = config.CONTENT_EVALUATION_PROMPT.format(transcript=transcript)
+        request = self._build_request(
+            self._format_summary_prompt,
+            full_transcript,
+            config.LLM_MAX_SUMMARY_TOKENS,
+            max_tokens=600  # More tokens for comprehensive summary
+        )
+        
+        cache_key = ResponseCache.key(request)
+        if self.cache is not None:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return cached
         
         try:
-            # Call Ollama API
-            response = requests.post(
-                f"{self.base_url}/api/generate",
-                json={
-                    'model': self.model,
-                    'prompt': prompt,
-                    'stream': False,
-                    'options': {
-                        'temperature': 0.3,  # Lower temperature for more consistent JSON
-                        'num_predict': 500   # Limit response length
-                    }
-                },
-                timeout=self.timeout
-            )
-            
-            if response.status_code != 200:
-                return self._error_response(f"Ollama API error: {response.status_code}")
+            # Call Groq API
+            response = self._create_completion(request)
             
             # Parse response
-            result = response.json()
-            llm_output = result.get('response', '')
+            llm_output = response.choices[0].message.content
             
             # Extract JSON from response
-            evaluation = self._parse_json_response(llm_output)
+            summary = self._parse_json(llm_output, self._validate_summary)
             
-            if evaluation:
-                evaluation['success'] = True
-                return evaluation
+            if summary:
+                summary['success'] = True
+                if self.cache is not None:
+                    self.cache.put(cache_key, summary)
+                return summary
             else:
-                return self._error_response("Failed to parse LLM response")
+                return self._error_summary_response("Failed to parse LLM response")
                 
-        except requests.exceptions.Timeout:
-            return self._error_response("Ollama request timed out")
-        except requests.exceptions.ConnectionError:
-            return self._error_response("Cannot connect to Ollama. Is it running?")
         except Exception as e:
-            return self._error_response(f"Evaluation error: {str(e)}")
+            return self._error_summary_response(f"Groq API error: {str(e)}")
     
-    def _parse_json_response(self, llm_output: str) -> Optional[Dict]:
+    def evaluate_and_summarize(self, transcript: str) -> Tuple[Dict[str, any], Dict[str, str]]:
         """
-        Parse JSON from LLM output.
+        Score a transcript and summarize it in a single Groq call.
         
-        LLM might return JSON with extra text, so we try to extract it.
+        Equivalent to evaluate_content plus generate_comprehensive_summary
+        on the same transcript, at one round trip and one prefill.
         
         Args:
-            llm_output: Raw LLM response
+            transcript: Complete transcript of the session
             
         Returns:
-            Parsed evaluation dict or None
+            Tuple of (evaluation, summary) in the shapes returned by
+            evaluate_content and generate_comprehensive_summary
         """
+        if not _is_evaluable(transcript):
+            # Neutral responses (too short or low-information), no API call
+            return self.evaluate_content(transcript), self._insufficient_summary_response()
+        
+        request = self._build_request(
+            self._format_fused_prompt,
+            transcript,
+            config.LLM_MAX_SUMMARY_TOKENS,
+            max_tokens=850  # Evaluation + summary, minus shared overhead
+        )
+        
+        cache_key = ResponseCache.key(request)
+        if self.cache is not None:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return cached['evaluation'], cached['summary']
+        
         try:
-            # Try direct JSON parse first
-            data = json.loads(llm_output)
-            return self._validate_evaluation(data)
-        except json.JSONDecodeError:
-            # Try to extract JSON from text
-            # Look for content between { and }
-            start = llm_output.find('{')
-            end = llm_output.rfind('}')
-            
-            if start != -1 and end != -1:
-                json_str = llm_output[start:end+1]
-                try:
-                    data = json.loads(json_str)
-                    return self._validate_evaluation(data)
-                except json.JSONDecodeError:
-                    pass
+            response = self._create_completion(request)
+            data = _extract_json(response.choices[0].message.content) or {}
+        except Exception as e:
+            error = f"Groq API error: {str(e)}"
+            return self._error_response(error), self._error_summary_response(error)
         
-        return None
+        # Split the combined object into the two result shapes
+        evaluation = self._validate_evaluation({key: data[key] for key in _SCORE_KEYS + ('summary',) if key in data})
+        summary = self._validate_summary({key: data[key] for key in _SUMMARY_KEYS if key in data})
+        
+        if evaluation:
+            evaluation['success'] = True
+        else:
+            evaluation = self._error_response("Failed to parse LLM response")
+        
+        if summary:
+            summary['success'] = True
+        else:
+            summary = self._error_summary_response("Failed to parse LLM response")
+        
+        if self.cache is not None and evaluation['success'] and summary['success']:
+            self.cache.put(cache_key, {'evaluation': evaluation, 'summary': summary})
+        
+        return evaluation, summary
     
-    def _validate_evaluation(self, data: Dict) -> Optional[Dict]:
+    def _validate_summary(self, data: Dict) -> Optional[Dict]:
         """
-        Validate and normalize evaluation data.
+        Validate comprehensive summary data.
         
         Args:
             data: Parsed JSON data
@@ -490,80 +1139,50 @@ def evaluate_transcript(transcript: str) -> Dict[str, any]:
         Returns:
             Validated dict or None
         """
-        required_keys = ['clarity', 'structure', 'technical', 'engagement', 'summary']
-        
-        # Check all keys present
-        if not all(key in data for key in required_keys):
+        if not _REQUIRED_SUMMARY_KEYS.issubset(data):
             return None
         
-        # Normalize scores to 0-100 range
-        for key in ['clarity', 'structure', 'technical', 'engagement']:
-            try:
-                score = float(data[key])
-                data[key] = max(0, min(100, score))
-            except (ValueError, TypeError):
-                return None
-        
-        # Ensure summary is string
-        if not isinstance(data['summary'], str):
-            data['summary'] = str(data['summary'])
+        # Ensure all values are strings
+        for key in _REQUIRED_SUMMARY_KEYS:
+            if not isinstance(data[key], str):
+                data[key] = str(data[key])
         
         return data
     
-    def _error_response(self, error_msg: str) -> Dict:
-        """
-        Generate error response with neutral scores.
-        
-        Args:
-            error_msg: Error message
-            
-        Returns:
-            Error response dict
-        """
-        return {
-            'clarity': 50,
-            'structure': 50,
-            'technical': 50,
-            'engagement': 50,
-            'summary': 'Evaluation unavailable',
-            'success': False,
-            'error': error_msg
-        }
+    def _error_summary_response(self, error_msg: str) -> Dict:
+        """Generate error response for comprehensive summary."""
+        response = dict(self._NEUTRAL_SUMMARY)
+        response['error'] = error_msg
+        return response
     
-    def evaluate_chunks(self, transcripts: list) -> Dict[str, any]:
-        """
-        Evaluate multiple transcript chunks and aggregate.
-        
-        Args:
-            transcripts: List of transcript strings
-            
-        Returns:
-            Aggregated evaluation scores
-        """
-        if not transcripts:
-            return self._error_response("No transcripts provided")
-        
-        evaluations = []
-        
-        for transcript in transcripts:
-            eval_result = self.evaluate_content(transcript)
-            if eval_result.get('success', False):
-                evaluations.append(eval_result)
-        
-        if not evaluations:
-            return self._error_response("All chunk evaluations failed")
-        
-        # Aggregate scores (average)
-        aggregated = {
-            'clarity': sum(e['clarity'] for e in evaluations) / len(evaluations),
-            'structure': sum(e['structure'] for e in evaluations) / len(evaluations),
-            'technical': sum(e['technical'] for e in evaluations) / len(evaluations),
-            'engagement': sum(e['engagement'] for e in evaluations) / len(evaluations),
-            'summary': ' '.join(e['summary'] for e in evaluations),
-            'success': True
-        }
-        
-        return aggregated
+    def _insufficient_summary_response(self) -> Dict:
+        """Summary response for a transcript with too little content."""
+        response = self._error_summary_response('Transcript too short')
+        response.update(topic='Insufficient content', what_went_well='N/A', improvements='N/A')
+        return response
+
+
+# Shared evaluator for the convenience functions (lazy loading), so
+# repeated calls reuse one Groq client and its connection pool
+_evaluator: Optional[ContentEvaluator] = None
+_evaluator_lock = threading.Lock()
+
+
+def _get_evaluator() -> ContentEvaluator:
+    """
+    Get or initialize the shared ContentEvaluator.
+    
+    Returns:
+        ContentEvaluator instance
+    """
+    global _evaluator
+    
+    if _evaluator is None:
+        with _evaluator_lock:
+            if _evaluator is None:
+                _evaluator = ContentEvaluator()
+    
+    return _evaluator
 
 
 def evaluate_transcript(transcript: str) -> Dict[str, any]:
@@ -576,5 +1195,4 @@ def evaluate_transcript(transcript: str) -> Dict[str, any]:
     Returns:
         Evaluation scores and summary
     """
-    evaluator = ContentEvaluator()
-    return evaluator.evaluate_content(transcript)
+    return _get_evaluator().evaluate_content(transcript)
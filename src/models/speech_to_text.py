@@ -3,9 +3,16 @@ Speech-to-Text Module
 Uses OpenAI Whisper API for fast transcription.
 """
 
+from concurrent.futures import ThreadPoolExecutor
 from openai import OpenAI
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Union
+import ffmpeg
+import functools
+import io
 import os
+import threading
+import numpy as np
+import soundfile as sf
 from src import config
 
 # Global OpenAI client (lazy loading)
@@ -38,6 +45,93 @@ def get_openai_client() -> OpenAI:
     return _openai_client
 
 
+def _encode_opus(source: Union[str, np.ndarray], sr: int = config.AUDIO_SAMPLE_RATE) -> Optional[bytes]:
+    """
+    Re-encode audio to mono Ogg/Opus at TRANSCRIPTION_OPUS_BITRATE.
+    
+    Speech at 24 kbps Opus is a small fraction of the size of PCM with no
+    practical loss for Whisper, so uploads stop being bandwidth-bound.
+    
+    Args:
+        source: Path to an audio/video file, or float32 mono samples at sr
+        sr: Sample rate of samples
+        
+    Returns:
+        Ogg/Opus bytes, or None if disabled or ffmpeg fails
+    """
+    if not config.TRANSCRIPTION_OPUS_BITRATE:
+        return None
+    
+    if isinstance(source, np.ndarray):
+        stream = ffmpeg.input('pipe:', format='f32le', ar=sr, ac=1)
+        data = np.ascontiguousarray(source, dtype=np.float32).tobytes()
+    else:
+        stream = ffmpeg.input(source)
+        data = None
+    
+    try:
+        out, _ = (
+            stream
+            .output(
+                'pipe:',
+                ac=1,
+                ar=config.AUDIO_SAMPLE_RATE,
+                acodec='libopus',
+                audio_bitrate=config.TRANSCRIPTION_OPUS_BITRATE,
+                # Size is fixed by the bitrate; the fastest encoder setting
+                # is ~5x quicker than the default at a near-identical size
+                compression_level=0,
+                format='ogg'
+            )
+            .global_args('-loglevel', 'error')
+            .run(input=data, capture_stdout=True, capture_stderr=True)
+        )
+    except (ffmpeg.Error, OSError) as e:
+        error_msg = e.stderr.decode(errors='replace') if getattr(e, 'stderr', None) else str(e)
+        print(f"Warning: Opus re-encode failed, uploading lossless audio: {error_msg}")
+        return None
+    
+    return out
+
+
+@functools.lru_cache(maxsize=4)
+def _encode_opus_file(audio_path: str, mtime_ns: int, size: int) -> Optional[bytes]:
+    """Opus-encode a file once per (path, mtime, size), see _encode_opus."""
+    return _encode_opus(audio_path)
+
+
+def _split_points(samples: np.ndarray, sr: int, segment_duration: float) -> List[int]:
+    """
+    Choose sample offsets that split audio into ~segment_duration pieces.
+    
+    Each split is moved to the quietest 100 ms frame within
+    TRANSCRIPTION_SPLIT_SEARCH seconds of its target, so words are not
+    cut in half. Only the search windows are scanned.
+    
+    Args:
+        samples: Mono samples
+        sr: Sample rate
+        segment_duration: Target segment length in seconds
+        
+    Returns:
+        Offsets from 0 to len(samples), inclusive
+    """
+    hop = max(1, sr // 10)
+    step = int(segment_duration * sr)
+    search = int(config.TRANSCRIPTION_SPLIT_SEARCH * sr)
+    
+    points = [0]
+    while len(samples) - points[-1] > step + search:
+        lo = points[-1] + step - search
+        window = samples[lo:lo + 2 * search]
+        frames = window[:len(window) // hop * hop].reshape(-1, hop)
+        quietest = int(np.argmin(np.einsum('ij,ij->i', frames, frames)))
+        points.append(lo + quietest * hop + hop // 2)
+    points.append(len(samples))
+    
+    return points
+
+
 class SpeechToText:
     """
     Transcribes audio using OpenAI Whisper API.
@@ -48,12 +142,17 @@ class SpeechToText:
         """Initialize speech-to-text processor."""
         self.client = None
     
-    def transcribe_audio(self, audio_path: str, language: Optional[str] = None) -> List[Dict]:
+    def transcribe_audio(
+        self,
+        audio: Union[str, np.ndarray],
+        language: Optional[str] = None
+    ) -> List[Dict]:
         """
-        Transcribe audio file to text using OpenAI Whisper API.
+        Transcribe audio to text using OpenAI Whisper API.
         
         Args:
-            audio_path: Path to audio file (WAV, MP3, etc.)
+            audio: Path to audio file (WAV, MP3, etc.) or float32 mono
+                samples at AUDIO_SAMPLE_RATE
             language: Language code (None for auto-detect, 'hi' for Hindi)
             
         Returns:
@@ -63,15 +162,10 @@ class SpeechToText:
         if self.client is None:
             self.client = get_openai_client()
         
-        # Open audio file
-        with open(audio_path, 'rb') as audio_file:
-            # Call OpenAI Whisper API
-            transcript = self.client.audio.transcriptions.create(
-                model="whisper-1",
-                file=audio_file,
-                language=language,  # None for auto-detect
-                response_format="text"
-            )
+        if isinstance(audio, np.ndarray):
+            transcript = self._transcribe_samples(audio, config.AUDIO_SAMPLE_RATE, language)
+        else:
+            transcript = self._transcribe_file(audio, language)
         
         # Return in same format as faster-whisper for compatibility
         return [{
@@ -80,21 +174,115 @@ class SpeechToText:
             'end': 0  # OpenAI doesn't provide timestamps in text mode
         }]
     
-    def get_full_transcript(self, audio_path: str, language: Optional[str] = None) -> str:
+    def _transcribe_samples(self, samples: np.ndarray, sr: int, language: Optional[str]) -> str:
+        """Transcribe mono samples without writing a temp file."""
+        encoded = _encode_opus(samples, sr)
+        if encoded is not None:
+            return self._create_transcription(("audio.ogg", encoded), language)
+        
+        # Fall back to in-memory FLAC; lossless, so Whisper sees the same
+        # audio, but a smaller upload than WAV
+        buffer = io.BytesIO()
+        sf.write(buffer, samples, sr, format='FLAC', subtype='PCM_16')
+        buffer.seek(0)
+        return self._create_transcription(("audio.flac", buffer), language)
+    
+    def _transcribe_file(self, audio_path: str, language: Optional[str]) -> str:
         """
-        Get full transcript as a single string.
+        Transcribe an audio file.
+        
+        Files longer than TRANSCRIPTION_SEGMENT_DURATION are split at quiet
+        points and the segments transcribed concurrently, then joined in
+        order. Uploads are re-encoded to Opus (see _encode_opus); formats
+        soundfile cannot decode are not split.
         
         Args:
             audio_path: Path to audio file
             language: Language code (None for auto-detect)
             
+        Returns:
+            Transcript text
+        """
+        try:
+            duration = sf.info(audio_path).duration
+        except RuntimeError:
+            duration = 0.0
+        
+        if duration <= config.TRANSCRIPTION_SEGMENT_DURATION:
+            stat = os.stat(audio_path)
+            encoded = _encode_opus_file(audio_path, stat.st_mtime_ns, stat.st_size)
+            if encoded is not None:
+                return self._create_transcription(("audio.ogg", encoded), language)
+            
+            with open(audio_path, 'rb') as audio_file:
+                return self._create_transcription(audio_file, language)
+        
+        samples, sr = sf.read(audio_path, dtype='float32')
+        if samples.ndim > 1:
+            samples = samples.mean(axis=1)
+        
+        points = _split_points(samples, sr, config.TRANSCRIPTION_SEGMENT_DURATION)
+        segments = [samples[start:end] for start, end in zip(points, points[1:])]
+        
+        with ThreadPoolExecutor(
+            max_workers=min(config.TRANSCRIPTION_MAX_WORKERS, len(segments)),
+            thread_name_prefix='transcribe'
+        ) as executor:
+            texts = list(executor.map(
+                lambda segment: self._transcribe_samples(segment, sr, language), segments
+            ))
+        
+        return ' '.join(text.strip() for text in texts if text.strip())
+    
+    def _create_transcription(self, audio_file, language: Optional[str]) -> str:
+        """Call OpenAI Whisper API on an open file or (name, buffer) tuple."""
+        return self.client.audio.transcriptions.create(
+            model="whisper-1",
+            file=audio_file,
+            language=language,  # None for auto-detect
+            response_format="text"
+        )
+    
+    def get_full_transcript(
+        self,
+        audio: Union[str, np.ndarray],
+        language: Optional[str] = None
+    ) -> str:
+        """
+        Get full transcript as a single string.
+        
+        Args:
+            audio: Path to audio file or float32 mono samples
+            language: Language code (None for auto-detect)
+            
         Returns:
             Full transcript text
         """
-        segments = self.transcribe_audio(audio_path, language)
+        segments = self.transcribe_audio(audio, language)
         return segments[0]['text']
 
 
+_stt: Optional[SpeechToText] = None
+_stt_lock = threading.Lock()
+
+
+def _get_stt() -> SpeechToText:
+    """
+    Get or initialize the shared SpeechToText.
+    
+    Returns:
+        SpeechToText instance
+    """
+    global _stt
+    
+    if _stt is None:
+        with _stt_lock:
+            if _stt is None:
+                _stt = SpeechToText()
+    
+    return _stt
+
+
 def transcribe(audio_path: str, language: Optional[str] = None) -> str:
     """
     Convenience function to transcribe audio.
@@ -106,8 +294,7 @@ def transcribe(audio_path: str, language: Optional[str] = None) -> str:
     Returns:
         Full transcript text
     """
-    stt = SpeechToText()
-    return stt.get_full_transcript(audio_path, language)
+    return _get_stt().get_full_transcript(audio_path, language)
 
 
 def transcribe_with_timestamps(audio_path: str, language: Optional[str] = None) -> List[Dict]:
@@ -124,6 +311,5 @@ def transcribe_with_timestamps(audio_path: str, language: Optional[str] = None)
     Returns:
         List of segments with text
     """
-    stt = SpeechToText()
-    return stt.transcribe_audio(audio_path, language)
+    return _get_stt().transcribe_audio(audio_path, language)
 